@@ -0,0 +1,378 @@
+"""Headless rendering benchmark.
+
+Drives EscapeRoom through scripted scenarios in an offscreen GL context
+and reports frame-time percentiles and draw calls per scenario:
+
+    python benchmark.py                              # EGL/hidden window, 1280x720
+    python benchmark.py --backend osmesa --size 640x360
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json   # exit 1 on regression
+
+Timings are machine specific: compare against a baseline recorded on the
+same machine (or CI runner type). Draw calls are deterministic.
+"""
+import argparse
+import ctypes
+import json
+import math
+import os
+import sys
+import time
+
+import glm
+
+
+# ======================================================
+# CONTEXT CREATION
+# ======================================================
+# PyOpenGL picks its platform on first import, so these run before
+# anything imports OpenGL (main.py included)
+def create_egl_context():
+    """Surfaceless EGL context (Mesa llvmpipe works without a GPU or display)"""
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("❌ eglInitialize failed")
+
+    config_attribs = (EGL.EGLint * 5)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE
+    )
+    config = EGL.EGLConfig()
+    count = EGL.EGLint()
+    EGL.eglChooseConfig(display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(count))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+
+    context_attribs = (EGL.EGLint * 7)(
+        EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+        EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE
+    )
+    context = EGL.eglCreateContext(
+        display, config if count.value else None, EGL.EGL_NO_CONTEXT, context_attribs
+    )
+    if not context:
+        raise RuntimeError("❌ eglCreateContext failed")
+
+    # Everything renders into our own framebuffer, so no surface is needed
+    if not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("❌ eglMakeCurrent failed")
+    return context
+
+
+def create_osmesa_context(width, height):
+    """OSMesa software context rendering into a client-side buffer"""
+    os.environ.setdefault("PYOPENGL_PLATFORM", "osmesa")
+    from OpenGL import GL, arrays, osmesa
+
+    attribs = arrays.GLintArray.asArray([
+        osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+        osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+        osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3,
+        osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+        0
+    ])
+    context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+    if not context:
+        raise RuntimeError("❌ OSMesaCreateContextAttribs failed")
+
+    buffer = arrays.GLubyteArray.zeros((height, width, 4))
+    if not osmesa.OSMesaMakeCurrent(context, buffer, GL.GL_UNSIGNED_BYTE, width, height):
+        raise RuntimeError("❌ OSMesaMakeCurrent failed")
+
+    # The buffer must outlive the context
+    return context, buffer
+
+
+def create_hidden_window(width, height):
+    """Invisible GLFW window (needs a display, but no fullscreen switch)"""
+    import glfw
+
+    if not glfw.init():
+        raise RuntimeError("GLFW initialization failed")
+
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, True)
+
+    window = glfw.create_window(width, height, "Escape Room - Benchmark", None, None)
+    if not window:
+        glfw.terminate()
+        raise RuntimeError("Failed to create GLFW window")
+
+    glfw.make_context_current(window)
+    glfw.swap_interval(0)
+    return window
+
+
+def create_context(backend, width, height):
+    if backend == "auto":
+        has_display = os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+        backend = "glfw" if has_display or sys.platform != "linux" else "egl"
+
+    if backend == "egl":
+        return backend, create_egl_context()
+    if backend == "osmesa":
+        return backend, create_osmesa_context(width, height)
+    return backend, create_hidden_window(width, height)
+
+
+# ======================================================
+# SCENARIOS
+# ======================================================
+class Scenario:
+    """Puts the game in a state, then nudges it once per frame"""
+
+    name = ""
+    STATE = "PLAYING"  # GameState attribute
+
+    def setup(self, app):
+        from main import Config, GameState
+
+        game = app.game
+        game.state = getattr(GameState, self.STATE)
+        game.board_visible = True
+        game.show_message = False
+        game.show_final_image = False
+        game.current_answer = ""
+
+        # Spawn point, facing the board
+        camera = app.camera
+        camera.position = glm.vec3(0, Config.PLAYER_HEIGHT, 3)
+        camera.yaw, camera.pitch = -90.0, 0.0
+        camera.update_vectors()
+        camera.snap()
+
+    def step(self, app, frame):
+        pass
+
+
+class Roaming(Scenario):
+    """Walk a circle around the room, sweeping the view across the board"""
+
+    name = "roaming"
+
+    def step(self, app, frame):
+        angle = frame * 0.02
+        camera = app.camera
+        camera.begin_tick()
+        camera.position.x = math.cos(angle) * 2.5
+        camera.position.z = math.sin(angle) * 2.5
+        camera.yaw = math.degrees(angle) * 1.5 - 90.0
+        camera.pitch = math.sin(angle * 3.0) * 15.0
+        camera.update_vectors()
+
+
+class PuzzleOpen(Scenario):
+    """Puzzle panel open, nothing typed"""
+
+    name = "puzzle"
+    STATE = "PUZZLE"
+
+
+class Typing(PuzzleOpen):
+    """Puzzle panel open, a character every few frames, wrong answers submitted"""
+
+    name = "typing"
+    ANSWER = "spongebob squarepants"
+
+    def step(self, app, frame):
+        game = app.game
+        if frame % 4 == 0:
+            game.current_answer += self.ANSWER[len(game.current_answer) % len(self.ANSWER)]
+        if len(game.current_answer) >= len(self.ANSWER):
+            game.wrong_answer()
+            game.reset_puzzle()
+
+
+class FinalImage(Scenario):
+    """The fullscreen ending image"""
+
+    name = "final"
+    STATE = "FINISHED"
+
+    def setup(self, app):
+        super().setup(app)
+        app.game.board_visible = False
+        app.game.show_final_image = True
+        app.game.final_timer = float("inf")
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (Roaming(), PuzzleOpen(), Typing(), FinalImage())}
+
+
+# ======================================================
+# MEASUREMENT
+# ======================================================
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def run_scenario(app, scenario, frames, warmup, dt):
+    from OpenGL.GL import glFinish
+    from gl_state import gl_state
+
+    scenario.setup(app)
+
+    frame_times = []
+    draw_calls = []
+
+    for frame in range(warmup + frames):
+        gl_state.begin_frame()
+        start = time.perf_counter()
+
+        scenario.step(app, frame)
+        app.game.update(dt, app.camera, None)
+        app.render_frame()
+
+        # Headless there's no swap to wait on; count the GPU work too
+        glFinish()
+
+        if frame >= warmup:
+            frame_times.append((time.perf_counter() - start) * 1000.0)
+            draw_calls.append(gl_state.draw_calls)
+
+    frame_times.sort()
+    return {
+        "frames": frames,
+        "mean_ms": sum(frame_times) / len(frame_times),
+        "p50_ms": percentile(frame_times, 50),
+        "p95_ms": percentile(frame_times, 95),
+        "p99_ms": percentile(frame_times, 99),
+        "max_ms": frame_times[-1],
+        "draw_calls": max(draw_calls),
+        "mean_draw_calls": sum(draw_calls) / len(draw_calls),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty if none)"""
+    regressions = []
+
+    for name, result in results.items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+
+        for key in ("p50_ms", "p95_ms"):
+            limit = reference[key] * (1.0 + tolerance)
+            if result[key] > limit:
+                regressions.append(
+                    f"{name}: {key} {result[key]:.2f} > {reference[key]:.2f} (+{tolerance:.0%})"
+                )
+
+        if result["draw_calls"] > reference["draw_calls"]:
+            regressions.append(
+                f"{name}: draw calls {result['draw_calls']} > {reference['draw_calls']}"
+            )
+
+    return regressions
+
+
+def print_report(results, backend, width, height, renderer):
+    print(f"\n📊 Benchmark ({backend}, {width}x{height}, {renderer})")
+    print(f"{'scenario':<10}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'draws':>7}")
+    for name, r in results.items():
+        print(
+            f"{name:<10}{r['mean_ms']:>9.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}{r['draw_calls']:>7}"
+        )
+
+
+# ======================================================
+# ENTRY POINT
+# ======================================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark")
+    parser.add_argument("--backend", choices=("auto", "egl", "osmesa", "glfw"), default="auto")
+    parser.add_argument("--size", default="1280x720", help="framebuffer size, WxH")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured frames per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only these (repeatable); default: all")
+    parser.add_argument("--dynamic-resolution", action="store_true",
+                        help="keep dynamic resolution on (off by default for repeatability)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed frame-time growth over the baseline (0.15 = 15%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    backend, context = create_context(args.backend, width, height)
+
+    # Only now is it safe to import the game (and with it OpenGL)
+    from OpenGL.GL import glGetString, GL_RENDERER
+    import main as game_main
+    from render_target import RenderTarget
+
+    game_main.Config.WIDTH, game_main.Config.HEIGHT = width, height
+    game_main.Config.DYNAMIC_RESOLUTION = args.dynamic_resolution
+
+    app = game_main.EscapeRoom()
+    app.init_opengl()
+    app.init_resources()
+    # Measure the finished scene, not placeholder textures
+    app.textures.finish()
+
+    # The offscreen target stands in for the window's framebuffer
+    screen = RenderTarget(width, height)
+    app.renderer.screen_framebuffer = screen.fbo
+    screen.bind()
+
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    for name in names:
+        results[name] = run_scenario(app, SCENARIOS[name], args.frames, args.warmup, 1.0 / 60)
+
+    renderer = glGetString(GL_RENDERER)
+    if isinstance(renderer, bytes):
+        renderer = renderer.decode()
+    print_report(results, backend, width, height, renderer)
+
+    report = {
+        "config": {"backend": backend, "width": width, "height": height, "renderer": renderer},
+        "scenarios": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for message in regressions:
+                print(f"   {message}")
+            return 1
+        print("✅ No regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ import glfw
 class Camera:
     def __init__(self, position):
         self.position = glm.vec3(position)
+        # Position at the start of the current simulation step
+        self.previous_position = glm.vec3(position)
         self.front = glm.vec3(0, 0, -1)
         self.up = glm.vec3(0, 1, 0)
 
@@ -22,10 +24,22 @@ class Camera:
         self.room_min = glm.vec3(-5.0, 0.0, -5.0)
         self.room_max = glm.vec3( 5.0, 2.0,  5.0)
 
-    def get_view_matrix(self):
+    def begin_tick(self):
+        self.previous_position = glm.vec3(self.position)
+
+    def snap(self):
+        """Don't interpolate from the old position (after a teleport)"""
+        self.previous_position = glm.vec3(self.position)
+
+    def render_position(self, alpha=1.0):
+        """Position blended between the last two simulation steps"""
+        return glm.mix(self.previous_position, self.position, alpha)
+
+    def get_view_matrix(self, alpha=1.0):
+        eye = self.render_position(alpha)
         return glm.lookAt(
-            self.position,
-            self.position + self.front,
+            eye,
+            eye + self.front,
             self.up
         )
 
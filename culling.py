@@ -0,0 +1,158 @@
+import numpy as np
+
+
+class Frustum:
+    """Six clip planes (ax + by + cz + d >= 0 inside) of a view-projection matrix"""
+
+    def __init__(self, view_projection):
+        # Raw glm memory is column-major: transpose to get the rows
+        columns = np.frombuffer(view_projection.to_bytes(), dtype=np.float32).reshape(4, 4)
+        rows = columns.T.astype(np.float64)
+
+        planes = np.array([
+            rows[3] + rows[0],  # Left
+            rows[3] - rows[0],  # Right
+            rows[3] + rows[1],  # Bottom
+            rows[3] - rows[1],  # Top
+            rows[3] + rows[2],  # Near
+            rows[3] - rows[2],  # Far
+        ])
+        planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+        self.normals = planes[:, :3]
+        self.abs_normals = np.abs(self.normals)
+        self.offsets = planes[:, 3]
+
+    def classify(self, mins, maxs):
+        """Vectorized box test for (N, 3) arrays.
+
+        Returns (visible, inside): boxes touching the frustum at all, and
+        boxes entirely inside it.
+        """
+        centers = (mins + maxs) * 0.5
+        extents = (maxs - mins) * 0.5
+
+        distance = centers @ self.normals.T + self.offsets   # (N, 6)
+        radius = extents @ self.abs_normals.T                # (N, 6)
+
+        visible = np.all(distance + radius >= 0.0, axis=1)
+        inside = np.all(distance - radius >= 0.0, axis=1)
+        return visible, inside
+
+
+class BVH:
+    """Bounding-volume hierarchy over axis-aligned boxes.
+
+    Nodes are stored in flat arrays; every node covers a contiguous
+    slice of the reordered item list, so a node that is entirely inside
+    the frustum accepts its whole subtree without further tests.
+    """
+
+    LEAF_SIZE = 4
+
+    def __init__(self, items, mins, maxs):
+        self.items = []
+        leaf_order = []
+        count = len(items)
+        mins = np.asarray(mins, dtype=np.float64).reshape(count, 3)
+        maxs = np.asarray(maxs, dtype=np.float64).reshape(count, 3)
+
+        node_mins, node_maxs = [], []
+        children, spans = [], []
+
+        def build(indices):
+            node = len(node_mins)
+            node_mins.append(mins[indices].min(axis=0))
+            node_maxs.append(maxs[indices].max(axis=0))
+            children.append((-1, -1))
+            spans.append((len(self.items), len(indices)))
+
+            if len(indices) <= self.LEAF_SIZE:
+                self.items.extend(items[i] for i in indices)
+                leaf_order.extend(indices)
+                return node
+
+            # Median split along the longest axis of the box centers
+            centers = (mins[indices] + maxs[indices]) * 0.5
+            axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+            order = indices[np.argsort(centers[:, axis], kind="stable")]
+            half = len(order) // 2
+
+            left = build(order[:half])
+            right = build(order[half:])
+            children[node] = (left, right)
+            return node
+
+        if count:
+            build(np.arange(count))
+
+        self.node_mins = np.array(node_mins).reshape(-1, 3)
+        self.node_maxs = np.array(node_maxs).reshape(-1, 3)
+        self.children = np.array(children, dtype=np.int64).reshape(-1, 2)
+        self.spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+        # Item boxes in leaf order, for the final per-item test
+        leaf_order = np.array(leaf_order, dtype=np.int64)
+        self.item_mins = mins[leaf_order]
+        self.item_maxs = maxs[leaf_order]
+
+    def query(self, frustum):
+        """Items whose boxes intersect the frustum"""
+        if not len(self.node_mins):
+            return []
+
+        result = []
+        partial = []
+        frontier = np.array([0], dtype=np.int64)
+
+        # Breadth-first: one vectorized plane test per tree level
+        while len(frontier):
+            visible, inside = frustum.classify(
+                self.node_mins[frontier], self.node_maxs[frontier]
+            )
+            is_leaf = self.children[frontier, 0] < 0
+
+            for start, count in self.spans[frontier[inside]]:
+                result.extend(self.items[start:start + count])
+
+            for start, count in self.spans[frontier[visible & ~inside & is_leaf]]:
+                partial.append(np.arange(start, start + count))
+
+            descend = frontier[visible & ~inside & ~is_leaf]
+            frontier = self.children[descend].reshape(-1)
+
+        # Leaves straddling a plane: test their items in one batch
+        if partial:
+            candidates = np.concatenate(partial)
+            visible, _ = frustum.classify(
+                self.item_mins[candidates], self.item_maxs[candidates]
+            )
+            result.extend(self.items[i] for i in candidates[visible])
+
+        return result
+
+
+class CullingSet:
+    """Scene nodes + payloads, with a BVH rebuilt only when a node changed"""
+
+    def __init__(self):
+        self.entries = []
+        self._bvh = None
+        self._versions = None
+
+    def add(self, node, payload):
+        self.entries.append((node, payload))
+        self._bvh = None
+
+    def visible(self, view_projection):
+        versions = tuple(node.version for node, _ in self.entries)
+        if self._bvh is None or versions != self._versions:
+            bounds = [node.world_bounds for node, _ in self.entries]
+            self._bvh = BVH(
+                [payload for _, payload in self.entries],
+                [[b_min.x, b_min.y, b_min.z] for b_min, _ in bounds],
+                [[b_max.x, b_max.y, b_max.z] for _, b_max in bounds],
+            )
+            self._versions = versions
+
+        return self._bvh.query(Frustum(view_projection))
@@ -0,0 +1,65 @@
+import math
+
+
+class DynamicResolution:
+    """Picks the 3D render scale that keeps GPU frame time near a target.
+
+    Feed it one GPU frame time (ms) per frame. Shading cost grows with
+    pixel count, i.e. with scale squared, so an over-budget frame shrinks
+    the scale by sqrt(target / measured); comfortable headroom grows it
+    back one step at a time. Scales are quantized to `STEP` and changes
+    are spaced `COOLDOWN` frames apart, so the offscreen target is not
+    reallocated every frame.
+    """
+
+    STEP = 0.05
+    COOLDOWN = 30
+    SMOOTHING = 0.1   # weight of the newest sample in the running average
+    HEADROOM = 0.75   # grow only below this fraction of the target
+
+    def __init__(self, target_ms, min_scale=0.5, max_scale=1.0, enabled=True):
+        self.target_ms = target_ms
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.enabled = enabled
+
+        self.scale = max_scale
+        self.average_ms = None
+        self._cooldown = self.COOLDOWN
+
+    def update(self, gpu_ms):
+        """Fold in the latest GPU frame time; returns the (new) scale"""
+        if not self.enabled or gpu_ms is None:
+            return self.scale
+
+        if self.average_ms is None:
+            self.average_ms = gpu_ms
+        else:
+            self.average_ms += (gpu_ms - self.average_ms) * self.SMOOTHING
+
+        self._cooldown -= 1
+        if self._cooldown > 0:
+            return self.scale
+
+        if self.average_ms > self.target_ms:
+            # Round down: always at least one step smaller
+            scale = self.scale * math.sqrt(self.target_ms / self.average_ms)
+            scale = math.floor(scale / self.STEP + 1e-6) * self.STEP
+        elif self.average_ms < self.target_ms * self.HEADROOM:
+            scale = self.scale + self.STEP
+        else:
+            return self.scale
+
+        scale = max(self.min_scale, min(self.max_scale, scale))
+
+        if abs(scale - self.scale) > 1e-6:
+            self.scale = scale
+            self._cooldown = self.COOLDOWN
+            # Older samples were taken at the previous scale
+            self.average_ms = None
+
+        return self.scale
+
+    def size(self, width, height):
+        """Render target size for a native width/height"""
+        return max(1, round(width * self.scale)), max(1, round(height * self.scale))
@@ -0,0 +1,62 @@
+import time
+
+import glfw
+
+
+class FrameScheduler:
+    """Fixed-timestep simulation clock plus frame pacing.
+
+    The simulation advances in steps of exactly `dt`; rendering happens
+    once per frame and blends the last two steps by `alpha`. Frames are
+    held to `fps_cap` (0 = uncapped, vsync alone limits), and while idle
+    the loop blocks on input for up to `idle_timeout` seconds instead of
+    spinning.
+    """
+
+    # Longest frame fed to the simulation, so a stall can't trigger a
+    # burst of catch-up steps
+    MAX_FRAME_TIME = 0.25
+
+    def __init__(self, tick_rate=60, fps_cap=0, idle_timeout=0.1):
+        self.dt = 1.0 / tick_rate
+        self.min_frame_time = 1.0 / fps_cap if fps_cap else 0.0
+        self.idle_timeout = idle_timeout
+
+        self.accumulator = 0.0
+        self.frame_start = time.perf_counter()
+        self.frame_time = 0.0
+        self.idle = False
+
+    def wait_events(self, idle):
+        """Poll input, or block until input/timeout when nothing animates"""
+        self.idle = idle
+        if idle:
+            glfw.wait_events_timeout(self.idle_timeout)
+        else:
+            glfw.poll_events()
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.frame_time = now - self.frame_start
+        self.frame_start = now
+        self.accumulator += min(self.frame_time, self.MAX_FRAME_TIME)
+
+    def ticks(self):
+        """Yield `dt` once per simulation step due this frame"""
+        while self.accumulator >= self.dt:
+            self.accumulator -= self.dt
+            yield self.dt
+
+    @property
+    def alpha(self):
+        """How far rendering is between the previous and current step (0..1)"""
+        return self.accumulator / self.dt
+
+    def end_frame(self):
+        """Sleep off the rest of the frame budget under the FPS cap"""
+        if not self.min_frame_time or self.idle:
+            return
+
+        remaining = self.frame_start + self.min_frame_time - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
@@ -0,0 +1,91 @@
+import glm
+import numpy as np
+from OpenGL.GL import *
+
+from gl_state import gl_state
+
+
+class FrameUniforms:
+    """std140 `Frame` uniform block shared by every shader program.
+
+    Layout (must match shaders/*.glsl):
+        mat4 projection;   // 3D perspective
+        mat4 view;
+        mat4 ortho;        // screen-space projection for UI/text
+        vec4 viewPos;
+        vec4 lightPos;
+        vec4 lightColor;
+
+    Projections are only rebuilt on resize; view data is uploaded once
+    per frame with a single glBufferSubData.
+    """
+
+    NAME = "Frame"
+    BINDING = 0
+
+    # Offsets in floats
+    PROJECTION = 0
+    VIEW = 16
+    ORTHO = 32
+    VIEW_POS = 48
+    LIGHT_POS = 52
+    LIGHT_COLOR = 56
+    SIZE = 60
+
+    def __init__(self, width, height, fov=60.0, near=0.1, far=100.0):
+        self.fov = fov
+        self.near = near
+        self.far = far
+        self.width = None
+        self.height = None
+        self.projection = glm.mat4(1.0)
+
+        self.data = np.zeros(self.SIZE, dtype=np.float32)
+
+        self.ubo = glGenBuffers(1)
+        gl_state.bind_buffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBufferBase(GL_UNIFORM_BUFFER, self.BINDING, self.ubo)
+
+        self.resize(width, height)
+
+    def _write(self, offset, value):
+        # Raw glm memory is column-major, as std140 expects
+        values = np.frombuffer(value.to_bytes(), dtype=np.float32)
+        self.data[offset:offset + len(values)] = values
+
+    def _upload(self, start, end):
+        gl_state.bind_buffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(
+            GL_UNIFORM_BUFFER,
+            start * 4,
+            (end - start) * 4,
+            self.data[start:end]
+        )
+
+    def resize(self, width, height):
+        """Rebuild both projections; no-op if the size is unchanged"""
+        if (width, height) == (self.width, self.height) or height == 0:
+            return
+
+        self.width = width
+        self.height = height
+
+        self.projection = glm.perspective(
+            glm.radians(self.fov), width / height, self.near, self.far
+        )
+        self._write(self.PROJECTION, self.projection)
+        self._write(self.ORTHO, glm.ortho(0.0, float(width), 0.0, float(height)))
+
+        self._upload(0, self.SIZE)
+
+    def set_light(self, position, color):
+        self._write(self.LIGHT_POS, glm.vec4(position, 1.0))
+        self._write(self.LIGHT_COLOR, glm.vec4(color, 1.0))
+        self._upload(self.LIGHT_POS, self.SIZE)
+
+    def update(self, view, view_pos):
+        """Per-frame camera data; one upload covering view..viewPos"""
+        self._write(self.VIEW, view)
+        self._write(self.VIEW_POS, glm.vec4(view_pos, 1.0))
+        self._upload(self.VIEW, self.VIEW_POS + 4)
@@ -0,0 +1,133 @@
+from OpenGL.GL import *
+
+
+class GLState:
+    """Shadow copy of the OpenGL state this game touches.
+
+    Every bind/enable goes through here; calls that would not change the
+    current state are skipped. `issued`/`skipped` count the current
+    frame (as does `draw_calls`, bumped by whoever issues a draw),
+    `last_frame` holds the totals of the previous one.
+    """
+
+    def __init__(self):
+        self.issued = 0
+        self.skipped = 0
+        self.draw_calls = 0
+        self.last_frame = {"issued": 0, "skipped": 0, "draw_calls": 0}
+        self._extensions = None
+        self.invalidate()
+
+    def has_extension(self, name):
+        if self._extensions is None:
+            count = int(glGetIntegerv(GL_NUM_EXTENSIONS))
+            self._extensions = set()
+            for i in range(count):
+                extension = glGetStringi(GL_EXTENSIONS, i)
+                if isinstance(extension, bytes):
+                    extension = extension.decode()
+                self._extensions.add(extension)
+        return name in self._extensions
+
+    def invalidate(self):
+        """Forget everything (e.g. after code that bypassed the tracker)"""
+        self._caps = {}
+        self._blend_func = None
+        self._depth_mask = None
+        self._program = None
+        self._active_unit = None
+        self._textures = {}
+        self._vao = None
+        self._buffers = {}
+        self._framebuffer = None
+
+    def begin_frame(self):
+        self.last_frame = {
+            "issued": self.issued,
+            "skipped": self.skipped,
+            "draw_calls": self.draw_calls,
+        }
+        self.issued = 0
+        self.skipped = 0
+        self.draw_calls = 0
+
+    def _changed(self, changed):
+        if changed:
+            self.issued += 1
+        else:
+            self.skipped += 1
+        return changed
+
+    # =============================
+    # CAPABILITIES
+    # =============================
+    def enable(self, cap):
+        if self._changed(self._caps.get(cap) is not True):
+            glEnable(cap)
+            self._caps[cap] = True
+
+    def disable(self, cap):
+        if self._changed(self._caps.get(cap) is not False):
+            glDisable(cap)
+            self._caps[cap] = False
+
+    def blend_func(self, src, dst):
+        if self._changed(self._blend_func != (src, dst)):
+            glBlendFunc(src, dst)
+            self._blend_func = (src, dst)
+
+    def depth_mask(self, flag):
+        flag = bool(flag)
+        if self._changed(self._depth_mask != flag):
+            glDepthMask(GL_TRUE if flag else GL_FALSE)
+            self._depth_mask = flag
+
+    # =============================
+    # BINDINGS
+    # =============================
+    def use_program(self, program):
+        program = int(program)
+        if self._changed(self._program != program):
+            glUseProgram(program)
+            self._program = program
+
+    def active_texture(self, unit):
+        if self._changed(self._active_unit != unit):
+            glActiveTexture(unit)
+            self._active_unit = unit
+
+    def bind_texture(self, texture, target=GL_TEXTURE_2D, unit=GL_TEXTURE0):
+        texture = int(texture)
+        if self._changed(self._textures.get((unit, target)) != texture):
+            self.active_texture(unit)
+            glBindTexture(target, texture)
+            self._textures[(unit, target)] = texture
+
+    def bind_vertex_array(self, vao):
+        vao = int(vao)
+        if self._changed(self._vao != vao):
+            glBindVertexArray(vao)
+            self._vao = vao
+
+    def bind_buffer(self, target, buffer):
+        # Element array bindings live in the VAO, so only track the rest
+        buffer = int(buffer)
+        if target == GL_ELEMENT_ARRAY_BUFFER:
+            glBindBuffer(target, buffer)
+            self.issued += 1
+            return
+
+        if self._changed(self._buffers.get(target) != buffer):
+            glBindBuffer(target, buffer)
+            self._buffers[target] = buffer
+
+    def bind_framebuffer(self, framebuffer):
+        # Binds read and draw together
+        framebuffer = int(framebuffer)
+        if self._changed(self._framebuffer != framebuffer):
+            glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+            self._framebuffer = framebuffer
+
+
+# One GL context per process, so one shared tracker
+gl_state = GLState()
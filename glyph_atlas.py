@@ -0,0 +1,193 @@
+from OpenGL.GL import *
+
+from gl_state import gl_state
+
+
+class SkylinePacker:
+    """Bottom-left skyline rectangle packer.
+
+    The skyline is a list of [x, y, width] segments describing the top of
+    everything packed so far. Each rectangle goes where its top edge ends
+    up lowest (ties: the narrowest segment), which keeps waste low for
+    glyph-sized rectangles of varying height.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.skyline = [[0, 0, width]]
+
+    def pack(self, width, height):
+        """Reserve a width x height rectangle; returns (x, y) or None if full"""
+        best = None  # (top, segment width, index, x, y)
+
+        for i, (x, _, segment_width) in enumerate(self.skyline):
+            y = self._fit(i, width, height)
+            if y is None:
+                continue
+
+            candidate = (y + height, segment_width, i, x, y)
+            if best is None or candidate[:2] < best[:2]:
+                best = candidate
+
+        if best is None:
+            return None
+
+        _, _, i, x, y = best
+        self._place(i, x, y, width, height)
+        return x, y
+
+    def _fit(self, i, width, height):
+        """Lowest y at which `width` fits starting at segment i, or None"""
+        x = self.skyline[i][0]
+        if x + width > self.width:
+            return None
+
+        y = 0
+        remaining = width
+        while remaining > 0:
+            _, segment_y, segment_width = self.skyline[i]
+            y = max(y, segment_y)
+            if y + height > self.height:
+                return None
+            remaining -= segment_width
+            i += 1
+        return y
+
+    def _place(self, i, x, y, width, height):
+        self.skyline.insert(i, [x, y + height, width])
+
+        # Trim (or drop) the segments now covered by the new one
+        right = x + width
+        j = i + 1
+        while j < len(self.skyline):
+            segment = self.skyline[j]
+            if segment[0] >= right:
+                break
+            overlap = right - segment[0]
+            segment[0] += overlap
+            segment[2] -= overlap
+            if segment[2] > 0:
+                break
+            del self.skyline[j]
+
+        # Merge neighbours at the same height
+        j = 0
+        while j < len(self.skyline) - 1:
+            if self.skyline[j][1] == self.skyline[j + 1][1]:
+                self.skyline[j][2] += self.skyline[j + 1][2]
+                del self.skyline[j + 1]
+            else:
+                j += 1
+
+
+class GlyphAtlas:
+    """One single-channel texture holding many glyph bitmaps.
+
+    `add()` packs a bitmap and returns its UV rectangle (u0, v0, u1, v1),
+    with v0 at the bitmap's top row. Glyphs are kept `padding` texels
+    apart so linear filtering never bleeds between neighbours.
+    """
+
+    def __init__(self, width=1024, height=1024, padding=1):
+        self.width = width
+        self.height = height
+        self.padding = padding
+        self.packer = SkylinePacker(width, height)
+
+        self.texture = glGenTextures(1)
+        gl_state.bind_texture(self.texture)
+
+        # Zero-filled so padding texels stay transparent
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_R8, width, height, 0,
+            GL_RED, GL_UNSIGNED_BYTE, bytes(width * height)
+        )
+
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+    def clear(self):
+        """Forget every glyph and zero the texture for reuse"""
+        self.packer = SkylinePacker(self.width, self.height)
+
+        gl_state.bind_texture(self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, 0, 0, self.width, self.height,
+            GL_RED, GL_UNSIGNED_BYTE, bytes(self.width * self.height)
+        )
+
+    def add(self, width, height, pixels):
+        """Upload a width x height 8-bit bitmap; returns its UVs, or None if full"""
+        if width == 0 or height == 0:
+            # Nothing to draw (e.g. space)
+            return (0.0, 0.0, 0.0, 0.0)
+
+        position = self.packer.pack(width + self.padding, height + self.padding)
+        if position is None:
+            return None
+
+        x, y = position
+        gl_state.bind_texture(self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, x, y, width, height,
+            GL_RED, GL_UNSIGNED_BYTE, pixels
+        )
+
+        return (
+            x / self.width,
+            y / self.height,
+            (x + width) / self.width,
+            (y + height) / self.height,
+        )
+
+
+class GlyphPages:
+    """GlyphAtlas pages created on demand under a texture-memory budget.
+
+    Pages are kept least recently used first (`touch()` marks a page as
+    drawn). When every page is full and the budget allows no more, the
+    least recently used page is cleared and `on_evict(page)` tells the
+    owner to forget the glyphs it held.
+    """
+
+    def __init__(self, page_size=512, budget=1 << 20, padding=1, on_evict=None):
+        self.page_size = page_size
+        self.padding = padding
+        self.max_pages = max(1, budget // (page_size * page_size))
+        self.on_evict = on_evict
+
+        self.pages = []
+        self.evictions = 0
+
+    def touch(self, page):
+        if self.pages[-1] is not page:
+            self.pages.remove(page)
+            self.pages.append(page)
+
+    def add(self, width, height, pixels):
+        """Pack a bitmap somewhere; returns (page, uv), or None if it can't fit a page"""
+        # Newest pages first: they're the ones with free space
+        for page in reversed(self.pages):
+            uv = page.add(width, height, pixels)
+            if uv is not None:
+                self.touch(page)
+                return page, uv
+
+        if len(self.pages) < self.max_pages:
+            page = GlyphAtlas(self.page_size, self.page_size, self.padding)
+        else:
+            page = self.pages.pop(0)
+            page.clear()
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(page)
+        self.pages.append(page)
+
+        uv = page.add(width, height, pixels)
+        return None if uv is None else (page, uv)
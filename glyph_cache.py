@@ -0,0 +1,196 @@
+import hashlib
+import mmap
+import os
+import struct
+
+import numpy as np
+
+
+class GlyphDiskCache:
+    """On-disk cache of rasterized glyphs, memory-mapped on load.
+
+    One file per key (the font files' contents plus the pixel size), so
+    editing or swapping a font simply misses the cache. Layout: a header
+    (magic, version, glyph and kerning pair counts), a fixed-size index
+    row per glyph, one row per kerning pair, then the 8-bit bitmaps.
+    Glyphs and pairs looked up this run are kept in memory and merged
+    into the file by `save()`.
+    """
+
+    MAGIC = b"GLYF"
+    VERSION = 2
+    HEADER = struct.Struct("<4sIII")
+    INDEX = np.dtype([
+        ("code", "<u4"),
+        ("width", "<u2"),
+        ("rows", "<u2"),
+        ("left", "<i2"),
+        ("top", "<i2"),
+        ("advance", "<i4"),     # 1/64th pixels
+        ("offset", "<u8"),      # from the start of the file
+    ])
+    KERNING = np.dtype([
+        ("left", "<u4"),
+        ("right", "<u4"),
+        ("x", "<i4"),           # 1/64th pixels
+    ])
+
+    def __init__(self, key, directory=".glyph_cache"):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{key}.bin")
+        self.hits = 0
+        self.misses = 0
+
+        self._file = None
+        self._map = None
+        self._index = {}
+        self._new = {}
+        self._kerning = {}
+        self._new_kerning = {}
+
+        self._open()
+
+    @staticmethod
+    def key(font_paths, pixel_size, mode="sdf"):
+        digest = hashlib.sha256(f"{mode}|{pixel_size}".encode())
+        for path in font_paths:
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    # =============================
+    # LOAD
+    # =============================
+    def _open(self):
+        try:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing (or empty) file: everything misses
+            self.close()
+            return
+
+        try:
+            magic, version, count, pair_count = self.HEADER.unpack_from(self._map, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError("unknown glyph cache format")
+
+            rows = np.frombuffer(self._map, self.INDEX, count, self.HEADER.size).copy()
+            pairs = np.frombuffer(
+                self._map, self.KERNING, pair_count, self.HEADER.size + rows.nbytes
+            ).copy()
+            ends = rows["offset"] + rows["width"].astype(np.uint64) * rows["rows"]
+            if count and int(ends.max()) > len(self._map):
+                raise ValueError("truncated glyph cache")
+        except (struct.error, ValueError) as e:
+            print(f"⚠️ Warning: ignoring glyph cache {self.path}: {e}")
+            self.close()
+            return
+
+        self._index = {int(row["code"]): row for row in rows}
+        self._kerning = {
+            (int(left), int(right)): int(x)
+            for left, right, x in zip(pairs["left"], pairs["right"], pairs["x"])
+        }
+
+    def get(self, code):
+        """(width, rows, left, top, advance, pixels) for `code`, or None"""
+        new = self._new.get(code)
+        if new is not None:
+            return new
+
+        row = self._index.get(code)
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        width, rows = int(row["width"]), int(row["rows"])
+        # A view into the mapping: uploaded without an intermediate copy
+        pixels = np.frombuffer(self._map, np.uint8, width * rows, int(row["offset"]))
+        return self._metrics(row) + (pixels,)
+
+    @staticmethod
+    def _metrics(row):
+        return (
+            int(row["width"]), int(row["rows"]),
+            int(row["left"]), int(row["top"]), int(row["advance"])
+        )
+
+    def get_kerning(self, left, right):
+        """Kerning between two codes, or None if the pair was never stored"""
+        pair = (left, right)
+        value = self._new_kerning.get(pair)
+        return self._kerning.get(pair) if value is None else value
+
+    # =============================
+    # STORE
+    # =============================
+    def put_kerning(self, left, right, x):
+        self._new_kerning[(left, right)] = x
+
+    def put(self, code, width, rows, left, top, advance, pixels):
+        self._new[code] = (width, rows, left, top, advance, bytes(pixels))
+
+    def save(self):
+        """Rewrite the file with every known glyph and pair (no-op if nothing is new)"""
+        if not self._new and not self._new_kerning:
+            return
+
+        # Copies, not views: the mapping is closed before the file is replaced
+        glyphs = {}
+        for code, row in self._index.items():
+            start = int(row["offset"])
+            end = start + int(row["width"]) * int(row["rows"])
+            glyphs[code] = self._metrics(row) + (self._map[start:end],)
+        glyphs.update(self._new)
+
+        kerning = {**self._kerning, **self._new_kerning}
+        pairs = np.zeros(len(kerning), dtype=self.KERNING)
+        if kerning:
+            pairs["left"], pairs["right"] = np.array(list(kerning), dtype=np.uint32).T
+            pairs["x"] = list(kerning.values())
+
+        index = np.zeros(len(glyphs), dtype=self.INDEX)
+        offset = self.HEADER.size + index.nbytes + pairs.nbytes
+        for row, (code, (width, rows, left, top, advance, _)) in zip(index, glyphs.items()):
+            row["code"], row["width"], row["rows"] = code, width, rows
+            row["left"], row["top"], row["advance"] = left, top, advance
+            row["offset"] = offset
+            offset += width * rows
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(glyphs), len(pairs)))
+                f.write(index.tobytes())
+                f.write(pairs.tobytes())
+                for glyph in glyphs.values():
+                    f.write(glyph[5])
+
+            self.close()
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Warning: could not write glyph cache: {e}")
+            return
+
+        self._new.clear()
+        self._new_kerning.clear()
+        self._open()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._map = None
+        self._index = {}
+        self._kerning = {}
+
+    def report(self):
+        print(
+            f"🗂️ Glyph cache: {len(self._index)} glyph(s) on disk, "
+            f"{self.hits} hit(s), {self.misses} miss(es)"
+        )
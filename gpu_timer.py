@@ -0,0 +1,112 @@
+import ctypes
+import time
+
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v as _raw_glGetQueryObjectui64v
+
+
+class GpuTimer:
+    """GPU time spent between `begin()` and `end()`, read one frame late.
+
+    Uses GL_TIMESTAMP queries (which, unlike GL_TIME_ELAPSED, may
+    overlap other timers). Two query pairs alternate, so the result being
+    read always belongs to the previous frame and never stalls the
+    pipeline. `ms` is None until the first result arrives.
+    """
+
+    def __init__(self):
+        self.queries = glGenQueries(4)
+        self.index = 0
+        self.pending = [False, False]
+        self.ms = None
+
+    def begin(self):
+        glQueryCounter(self.queries[self.index * 2], GL_TIMESTAMP)
+
+    def end(self):
+        glQueryCounter(self.queries[self.index * 2 + 1], GL_TIMESTAMP)
+        self.pending[self.index] = True
+
+        # The other pair was issued a frame ago: collect it if it's done
+        self.index ^= 1
+        self._collect(self.index)
+
+    def _collect(self, index):
+        if not self.pending[index]:
+            return
+
+        start, end = self.queries[index * 2], self.queries[index * 2 + 1]
+        if not glGetQueryObjectiv(end, GL_QUERY_RESULT_AVAILABLE):
+            # Still in flight; this sample is dropped when the pair is reused
+            return
+
+        self.pending[index] = False
+        self.ms = (_query_result(end) - _query_result(start)) / 1e6
+
+
+class PassTimer:
+    """CPU and GPU milliseconds per named render section.
+
+    Sections run back to back and must not nest (GL_TIME_ELAPSED queries
+    can't). Each frame's queries are kept in their own list and the two
+    lists alternate, so results are read a frame after they were issued
+    and never stall. A section that occurs several times in a frame is
+    summed. `gpu_ms`/`cpu_ms` hold the latest complete frame.
+    """
+
+    def __init__(self):
+        self._free = []
+        self._frames = ([], [])  # (name, query, cpu_ms) per section run
+        self._index = 0
+        self._current = None
+
+        self.gpu_ms = {}
+        self.cpu_ms = {}
+
+    def begin(self, name):
+        """Start timing `name` (ends the running section, if any)"""
+        if self._current is not None:
+            self.end()
+
+        query = self._free.pop() if self._free else int(glGenQueries(1)[0])
+        glBeginQuery(GL_TIME_ELAPSED, query)
+        self._current = (name, query, time.perf_counter())
+
+    def end(self):
+        if self._current is None:
+            return
+
+        glEndQuery(GL_TIME_ELAPSED)
+        name, query, start = self._current
+        self._frames[self._index].append(
+            (name, query, (time.perf_counter() - start) * 1000.0)
+        )
+        self._current = None
+
+    def end_frame(self):
+        self.end()
+
+        # The other list was filled a frame ago
+        self._index ^= 1
+        sections = self._frames[self._index]
+        if not sections:
+            return
+
+        # Results become available in order: the last one covers the rest
+        if glGetQueryObjectiv(sections[-1][1], GL_QUERY_RESULT_AVAILABLE):
+            gpu_ms, cpu_ms = {}, {}
+            for name, query, cpu in sections:
+                gpu_ms[name] = gpu_ms.get(name, 0.0) + _query_result(query) / 1e6
+                cpu_ms[name] = cpu_ms.get(name, 0.0) + cpu
+            self.gpu_ms, self.cpu_ms = gpu_ms, cpu_ms
+
+        # Still in flight otherwise: drop the sample, reuse the queries
+        self._free.extend(query for _, query, _ in sections)
+        sections.clear()
+
+
+def _query_result(query):
+    # PyOpenGL's wrapper can't size the 64-bit output; use the raw entry point
+    value = ctypes.c_uint64(0)
+    _raw_glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(value))
+    return value.value
@@ -2,13 +2,24 @@ import glfw
 from OpenGL.GL import *
 import glm
 import time
-from PIL import Image
-import numpy as np
 
-from shader import Shader
+from shader import Shader, ShaderLibrary
 from camera import Camera
-from mesh import CubeMesh
+from mesh import CubeMesh, mesh_cache
 from text_renderer import TextRenderer
+from texture import AsyncTextureLoader
+from scene import SceneNode, InstanceGroup
+from room import RoomBuilder
+from culling import CullingSet
+from render_queue import RenderQueue
+from render_target import RenderTarget
+from gl_state import gl_state
+from frame_uniforms import FrameUniforms
+from frame_scheduler import FrameScheduler
+from dynamic_resolution import DynamicResolution
+from gpu_timer import GpuTimer, PassTimer
+from perf_hud import PerfHud
+from profiler import profiler
 
 
 # ======================================================
@@ -29,6 +40,11 @@ class Level:
 # ======================================================
 class Config:
     WIDTH, HEIGHT = 1000, 700
+
+    # Display: fullscreen at the monitor's mode unless overridden
+    WINDOWED = False
+    RESOLUTION = None    # (width, height), or None for the monitor's mode
+
     ROOM_SIZE = 10.0
     ROOM_LIMIT = 4.5
     PLAYER_HEIGHT = 1.0
@@ -36,18 +52,73 @@ class Config:
     CROSSHAIR_SIZE = 20
     INTERACTION_DISTANCE = 3.0
     INTERACTION_DOT_THRESHOLD = 0.96
+    TEXTURE_TILE_SIZE = 2.0  # world units per texture repeat on floor/walls
+
+    # Frame pacing
+    TICK_RATE = 60       # fixed simulation steps per second
+    VSYNC = True
+    FPS_CAP = 0          # 0 = uncapped (vsync alone limits)
+    IDLE_TIMEOUT = 0.1   # longest wait for input while idle (cursor blink is 0.5s)
+
+    # Freeze the (darkened) 3D scene into a texture while the puzzle is open
+    PUZZLE_SCENE_CACHE = True
+
+    # Dynamic resolution: the 3D pass shrinks to hold this GPU frame time;
+    # UI and text always render at native resolution
+    DYNAMIC_RESOLUTION = True
+    FRAME_TIME_TARGET_MS = 14.0   # leaves headroom under a 60 Hz refresh
+    MIN_RENDER_SCALE = 0.5
+
+    # Performance HUD (FPS, per-pass CPU/GPU ms, draw calls)
+    HUD_KEY = glfw.KEY_F3
+
+    # CPU profiler: markers cost nothing unless enabled; the trace is
+    # written on PROFILE_KEY and at exit (open in chrome://tracing or Perfetto)
+    PROFILE = False
+    PROFILE_KEY = glfw.KEY_F4
+    PROFILE_TRACE_PATH = "profile_trace.json"
+
+    # Text: glyphs are rasterized on first use; characters the game font
+    # lacks (e.g. ✓ ✗) come from the first of these that exists
+    FALLBACK_FONTS = (
+        "fonts/fallback.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "C:/Windows/Fonts/seguisym.ttf",
+        "/System/Library/Fonts/Apple Symbols.ttf",
+    )
+    GLYPH_ATLAS_BUDGET = 1 << 20   # bytes of glyph atlas pages (512x512 R8 each)
+
+    # Crates stacked in the room's corners: (x, z, stack height)
+    CRATE_MODEL = "assets/models/crate.obj"
+    CRATE_SIZE = 0.6
+    CRATE_STACKS = (
+        (-4.5, -4.5, 2), (-3.85, -4.5, 1),
+        (4.5, 4.5, 3), (3.85, 4.5, 1), (4.5, 3.85, 2),
+        (-4.5, 4.5, 1),
+    )
 
 
 class UIConfig:
     PANEL_WIDTH = 700
     PANEL_HEIGHT = 300
 
-    TITLE_Y_OFFSET = 90
+    PANEL_PADDING = 40   # text is wrapped to the panel width minus this on each side
+
+    # Baselines, from the panel center (label and answer follow the question)
+    TITLE_Y_OFFSET = 85
     QUESTION_Y_OFFSET = 40
-    ANSWER_LABEL_Y_OFFSET = -20
-    ANSWER_TEXT_Y_OFFSET = -70
+    MESSAGE_Y_OFFSET = -50   # from the panel's bottom edge
+    LINE_GAP = 10
+
+    TITLE_SCALE = 0.9
+    QUESTION_SCALE = 0.45
+    LABEL_SCALE = 0.45
+    ANSWER_SCALE = 0.55
+    MESSAGE_SCALE = 0.6
 
     PANEL_BG_COLOR = glm.vec3(0.05, 0.05, 0.08)
+    PANEL_ALPHA = 0.85
+    OVERLAY_ALPHA = 0.45
 
 
 # ======================================================
@@ -135,6 +206,7 @@ class Game:
         camera.yaw = -90
         camera.pitch = 0
         camera.update_vectors()
+        camera.snap()
 
         print(f"➡️ Entered Level {self.current_level_index + 1}")
 
@@ -192,232 +264,298 @@ class Game:
             self.cursor_timer = 0.0
 
 
-# ======================================================
-# TEXTURE LOADER
-# ======================================================
-class TextureManager:
-    @staticmethod
-    def load_texture(path):
-        texture = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture)
-
-        # Critical alignment setting for Windows compatibility
-        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-
-        # Texture parameters
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-
-        # Load and prepare image
-        image = Image.open(path).convert("RGB")
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)
-
-        img_data = np.array(image, dtype=np.uint8)
-        img_data = np.ascontiguousarray(img_data)
-
-        glTexImage2D(
-            GL_TEXTURE_2D, 0, GL_RGB,
-            image.width, image.height, 0,
-            GL_RGB, GL_UNSIGNED_BYTE,
-            img_data.tobytes()
-        )
-
-        glGenerateMipmap(GL_TEXTURE_2D)
-
-        return texture
-
-
 # ======================================================
 # RENDERER
 # ======================================================
 class Renderer:
-    def __init__(self, shader, cube, image_shader):
-        self.shader = shader
-        self.cube = cube
-        self.image_shader = image_shader
-
-
-    def draw_dark_overlay(self, alpha=0.45):
-        """Draw semi-transparent dark overlay"""
-        glDisable(GL_DEPTH_TEST)
+    """Turns draw requests into RenderQueue packets; passes are flushed sorted"""
 
-        self.shader.use()
+    # The room encloses the camera: draw it after everything in front of it
+    ROOM_DEPTH = float("inf")
 
-        ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-        self.shader.set_mat4("projection", ortho)
-        self.shader.set_mat4("view", glm.mat4(1))
+    def __init__(self, shaders, cube):
+        self.cube = cube
+        self.queue = RenderQueue()
+        self.view_pos = glm.vec3(0)
+
+        # The window's framebuffer (0 unless rendering somewhere else)
+        self.screen_framebuffer = 0
+        self.width, self.height = Config.WIDTH, Config.HEIGHT
+
+        # Frozen copy of the scene, see capture_scene()
+        self.scene_cache = None
+        self.scene_cached = False
+
+        # Reduced-resolution 3D pass, see begin_scene()
+        self.scene_target = None
+        self.scene_scaled = False
+
+        # Cheapest variant that does the job, per kind of draw
+        self.textured_shader = shaders["lit_textured"]
+        self.instanced_shader = shaders["lit_textured_instanced"]
+        self.colored_shader = shaders["lit_colored"]
+        self.ui_shader = shaders["screen_colored"]
+        self.image_shader = shaders["image"]
+        self.text_shader = shaders["text"]
+
+        # Every textured draw samples unit 0
+        for shader, sampler in (
+            (self.textured_shader, "texture1"),
+            (self.instanced_shader, "texture1"),
+            (self.image_shader, "image"),
+            (self.text_shader, "text"),
+        ):
+            shader.use()
+            shader.set_int(sampler, 0)
+
+        # Screen-space quads only move when the window is resized
+        self.fullscreen_node = SceneNode()
+        self.panel_node = SceneNode(
+            scale=glm.vec3(UIConfig.PANEL_WIDTH, UIConfig.PANEL_HEIGHT, 1)
+        )
+        self.room_node = SceneNode()
+        self.crosshair_nodes = (
+            SceneNode(scale=glm.vec3(Config.CROSSHAIR_SIZE, 2, 1)),
+            SceneNode(scale=glm.vec3(2, Config.CROSSHAIR_SIZE, 1)),
+        )
+        self.resize(Config.WIDTH, Config.HEIGHT)
+
+    def resize(self, width, height):
+        """Re-center the screen-space quads; drops the cached scene"""
+        self.width, self.height = width, height
+        self.invalidate_scene_cache()
+
+        screen_center = glm.vec3(width / 2, height / 2, 0)
+
+        self.fullscreen_node.position = screen_center
+        self.fullscreen_node.scale = glm.vec3(width, height, 1)
+        self.panel_node.position = screen_center
+        for node in self.crosshair_nodes:
+            node.position = screen_center
+
+    # =============================
+    # FRAME / PASSES
+    # =============================
+    def begin_frame(self, view_pos):
+        """Start a frame; `view_pos` is the eye used for depth sorting"""
+        self.view_pos = glm.vec3(view_pos)
+        self.queue.begin_frame()
+        gl_state.bind_framebuffer(self.screen_framebuffer)
+
+    def flush(self, render_pass):
+        self.queue.flush(render_pass)
+
+    # =============================
+    # SCALED SCENE PASS
+    # =============================
+    def begin_scene(self, width, height):
+        """Route the 3D pass into a width x height offscreen target (if below native size)"""
+        self.scene_scaled = (width, height) != (self.width, self.height)
+        if not self.scene_scaled:
+            return
 
-        # Semi-transparent black
-        self.shader.set_vec3("objectColor", glm.vec3(0, 0, 0))
+        if self.scene_target is None:
+            self.scene_target = RenderTarget()
+        self.scene_target.resize(width, height)
+        self.scene_target.bind()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        # Disable texture
-        glBindTexture(GL_TEXTURE_2D, 0)
+    def end_scene(self):
+        """Upscale the 3D pass onto the screen; UI then draws at native size"""
+        if not self.scene_scaled:
+            return
 
-        model = glm.mat4(1)
-        model = glm.translate(
-            model, glm.vec3(Config.WIDTH / 2, Config.HEIGHT / 2, 0)
+        self.queue.begin_section("upscale")
+        self.scene_target.blit_to(self.screen_framebuffer, self.width, self.height)
+        self.queue.end_section()
+        glViewport(0, 0, self.width, self.height)
+        self.scene_scaled = False
+
+    # =============================
+    # SCENE CACHE
+    # =============================
+    def invalidate_scene_cache(self):
+        self.scene_cached = False
+
+    def capture_scene(self, render_scene, darken_alpha=None):
+        """Render the 3D scene once into an offscreen texture.
+
+        With `darken_alpha` the dark overlay is baked in as well, so
+        drawing the cache costs a single blit and no blending.
+        """
+        if self.scene_cache is None:
+            self.scene_cache = RenderTarget()
+        self.scene_cache.resize(self.width, self.height)
+        self.scene_cache.bind()
+
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        render_scene()
+
+        if darken_alpha is not None:
+            self.draw_dark_overlay(darken_alpha)
+            self.flush(RenderQueue.UI)
+
+        gl_state.bind_framebuffer(self.screen_framebuffer)
+        glViewport(0, 0, self.width, self.height)
+        self.scene_cached = True
+
+    def draw_scene_cache(self):
+        self.queue.begin_section("scene cache")
+        self.scene_cache.blit_to(self.screen_framebuffer, self.width, self.height, GL_NEAREST)
+        self.queue.end_section()
+
+    def depth_of(self, node):
+        """Distance from the eye to the center of a node's world bounds"""
+        bounds_min, bounds_max = node.world_bounds
+        return glm.distance(self.view_pos, (bounds_min + bounds_max) * 0.5)
+
+    def set_model(self, shader, node):
+        """Upload a node's cached model and normal matrices"""
+        shader.set_mat4("model", node.model)
+        shader.set_mat3("normalMatrix", node.normal_matrix)
+
+    # =============================
+    # 3D (OPAQUE PASS)
+    # =============================
+    def draw_room(self, room, floor_texture, wall_texture, wall_tint):
+        """Draw the static room shell: one buffer, one draw per material"""
+        shader = self.textured_shader
+
+        def draw_material(material, tint):
+            def draw():
+                shader.set_vec3("tint", tint)
+                self.set_model(shader, self.room_node)
+                room.draw(material)
+            return draw
+
+        self.queue.submit(
+            RenderQueue.OPAQUE, shader, draw_material("floor", glm.vec3(1)),
+            floor_texture, self.ROOM_DEPTH, "scene"
         )
-        model = glm.scale(
-            model, glm.vec3(Config.WIDTH, Config.HEIGHT, 1)
+        self.queue.submit(
+            RenderQueue.OPAQUE, shader, draw_material("walls", glm.vec3(wall_tint)),
+            wall_texture, self.ROOM_DEPTH, "scene"
         )
 
-        self.shader.set_mat4("model", model)
+    def draw_textured_cube(self, node, texture):
+        """Draw a textured cube with the node's transform"""
+        shader = self.textured_shader
 
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        def draw():
+            shader.set_vec3("tint", glm.vec3(1))
+            self.set_model(shader, node)
+            self.cube.draw()
 
-        self.cube.draw()
+        self.queue.submit(
+            RenderQueue.OPAQUE, shader, draw, texture, self.depth_of(node), "scene"
+        )
 
-    def draw_textured_cube(self, pos, scale, texture):
-        """Draw a textured cube at the given position and scale"""
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, texture)
-        self.shader.set_int("texture1", 0)
+    def draw_instanced(self, mesh, texture, group):
+        """Draw every node of an InstanceGroup as `mesh` in a single call"""
+        if not group.nodes:
+            return
 
-        model = glm.mat4(1.0)
-        model = glm.translate(model, pos)
-        model = glm.scale(model, scale)
-        self.shader.set_mat4("model", model)
+        def draw():
+            group.sync(mesh).draw()
 
-        self.cube.draw()
+        # Sorted by its nearest member
+        depth = min(self.depth_of(node) for node in group.nodes)
+        self.queue.submit(
+            RenderQueue.OPAQUE, self.instanced_shader, draw, texture, depth, "scene"
+        )
 
-    def draw_colored_cube(self, pos, scale, color):
+    def draw_colored_cube(self, node, color):
         """Draw a colored cube (no texture)"""
-        glBindTexture(GL_TEXTURE_2D, 0)
-        self.shader.set_vec3("objectColor", color)
-
-        model = glm.mat4(1.0)
-        model = glm.translate(model, pos)
-        model = glm.scale(model, scale)
-        self.shader.set_mat4("model", model)
+        shader = self.colored_shader
+        color = glm.vec3(color)
 
-        self.cube.draw()
+        def draw():
+            shader.set_vec3("objectColor", color)
+            shader.set_vec3("tint", glm.vec3(1))
+            self.set_model(shader, node)
+            self.cube.draw()
 
-    def draw_board(self, pos, size):
-        """Draw the puzzle board with frame"""
-        glBindTexture(GL_TEXTURE_2D, 0)
+        self.queue.submit(
+            RenderQueue.OPAQUE, shader, draw, depth=self.depth_of(node), label="scene"
+        )
 
-        # ===== FRAME (back, darker) =====
-        frame_size = size + glm.vec3(0.18, 0.18, 0.04)
-        self.shader.set_vec3("objectColor", glm.vec3(0.25, 0.18, 0.12))  # dark wood
+    def draw_board(self, parts):
+        """Draw the (visible) puzzle board parts: (node, color) pairs"""
+        for node, color in parts:
+            self.draw_colored_cube(node, color)
+
+    # =============================
+    # UI (SUBMISSION ORDER)
+    # =============================
+    def draw_screen_quad(self, node, color, alpha=1.0, label="quad"):
+        """Flat-colored screen-space quad"""
+        shader = self.ui_shader
+        color = glm.vec3(color)
+
+        def draw():
+            shader.set_vec3("objectColor", color)
+            shader.set_float("alpha", alpha)
+            shader.set_mat4("model", node.model)
+            self.cube.draw()
+
+        self.queue.submit(RenderQueue.UI, shader, draw, label=label)
+
+    def draw_rect(self, x, y, width, height, color, alpha=1.0, label="quad"):
+        """Flat-colored rectangle from its bottom-left corner (in pixels)"""
+        shader = self.ui_shader
+        color = glm.vec3(color)
+        model = glm.scale(
+            glm.translate(glm.mat4(1.0), glm.vec3(x + width / 2, y + height / 2, 0)),
+            glm.vec3(width, height, 1)
+        )
 
-        model = glm.mat4(1.0)
-        model = glm.translate(model, pos - glm.vec3(0, 0, 0.04))
-        model = glm.scale(model, frame_size)
-        self.shader.set_mat4("model", model)
-        self.cube.draw()
+        def draw():
+            shader.set_vec3("objectColor", color)
+            shader.set_float("alpha", alpha)
+            shader.set_mat4("model", model)
+            self.cube.draw()
 
-        # ===== BOARD SURFACE (front, brighter) =====
-        self.shader.set_vec3("objectColor", glm.vec3(0.85, 0.75, 0.55))  # light wood
+        self.queue.submit(RenderQueue.UI, shader, draw, label=label)
 
-        model = glm.mat4(1.0)
-        model = glm.translate(model, pos)
-        model = glm.scale(model, size)
-        self.shader.set_mat4("model", model)
-        self.cube.draw()
+    def draw_dark_overlay(self, alpha=0.45):
+        """Draw semi-transparent dark overlay"""
+        self.draw_screen_quad(self.fullscreen_node, glm.vec3(0), alpha, "overlay")
 
     def draw_crosshair(self):
         """Draw the crosshair overlay"""
-        glDisable(GL_DEPTH_TEST)
-
-        self.shader.use()
-
-        ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-        self.shader.set_mat4("projection", ortho)
-        self.shader.set_mat4("view", glm.mat4(1))
-
-        # Reset lighting for 2D
-        self.shader.set_vec3("lightColor", glm.vec3(1.2, 1.2, 1.2))
-        self.shader.set_vec3("lightPos", glm.vec3(0))
-        self.shader.set_vec3("viewPos", glm.vec3(0))
-        self.shader.set_vec3("objectColor", glm.vec3(1))
-
-        # Disable texture
-        glBindTexture(GL_TEXTURE_2D, 0)
-
-        # Horizontal line
-        model = glm.mat4(1)
-        model = glm.translate(model, glm.vec3(Config.WIDTH / 2, Config.HEIGHT / 2, 0))
-        model = glm.scale(model, glm.vec3(Config.CROSSHAIR_SIZE, 2, 1))
-        self.shader.set_mat4("model", model)
-        self.cube.draw()
-
-        # Vertical line
-        model = glm.mat4(1)
-        model = glm.translate(model, glm.vec3(Config.WIDTH / 2, Config.HEIGHT / 2, 0))
-        model = glm.scale(model, glm.vec3(2, Config.CROSSHAIR_SIZE, 1))
-        self.shader.set_mat4("model", model)
-        self.cube.draw()
+        # Horizontal + vertical line
+        for node in self.crosshair_nodes:
+            self.draw_screen_quad(node, glm.vec3(1), label="crosshair")
 
     def draw_ui_panel(self):
         """Draw the puzzle UI panel background"""
-        glDisable(GL_DEPTH_TEST)
-
-        self.shader.use()
-
-        ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-        self.shader.set_mat4("projection", ortho)
-        self.shader.set_mat4("view", glm.mat4(1))
-        self.shader.set_vec3("objectColor", UIConfig.PANEL_BG_COLOR)
-
-        # Disable texture
-        glBindTexture(GL_TEXTURE_2D, 0)
-
-        model = glm.mat4(1)
-
-        # Centered panel
-        model = glm.translate(
-            model,
-            glm.vec3(Config.WIDTH / 2, Config.HEIGHT / 2, 0)
-        )
-
-        model = glm.scale(
-            model,
-            glm.vec3(UIConfig.PANEL_WIDTH, UIConfig.PANEL_HEIGHT, 1)
+        self.draw_screen_quad(
+            self.panel_node, UIConfig.PANEL_BG_COLOR, UIConfig.PANEL_ALPHA, "panel"
         )
 
-        self.shader.set_mat4("model", model)
-
-        # Ensure blending is enabled
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-        self.cube.draw()
-
     def draw_fullscreen_image(self, texture):
-        if self.image_shader is None:
-            print("❌ image_shader is None!")
-            return
+        shader = self.image_shader
 
-        glDisable(GL_DEPTH_TEST)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        def draw():
+            shader.set_mat4("model", self.fullscreen_node.model)
+            self.cube.draw()
 
-        self.image_shader.use()
+        self.queue.submit(RenderQueue.UI, shader, draw, texture, label="image")
 
-        ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-        self.image_shader.set_mat4("projection", ortho)
+    def draw_text(self, text_renderer, text, x, y, scale, color, label="text",
+                  max_width=None, align="left"):
+        """Queue text (first baseline at y, aligned on x); the text renderer binds its own atlas page(s)"""
+        color = glm.vec3(color)
 
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, texture)
-        self.image_shader.set_int("image", 0)
+        def draw():
+            text_renderer.render_text(
+                self.text_shader, text, x, y, scale, color, max_width, align
+            )
 
-        model = glm.mat4(1)
-        model = glm.translate(
-            model,
-            glm.vec3(Config.WIDTH / 2, Config.HEIGHT / 2, 0)
-        )
-        model = glm.scale(
-            model,
-            glm.vec3(Config.WIDTH, Config.HEIGHT, 1)
+        self.queue.submit(
+            RenderQueue.UI, self.text_shader, draw, label=label
         )
 
-        self.image_shader.set_mat4("model", model)
-
-        self.cube.draw()
-
 
 # ======================================================
 # PLAYER CONTROLLER
@@ -475,9 +613,10 @@ class PlayerController:
 # INPUT HANDLERS
 # ======================================================
 class InputHandler:
-    def __init__(self, game, player_controller):
+    def __init__(self, game, player_controller, hud=None):
         self.game = game
         self.player = player_controller
+        self.hud = hud
 
     def handle_mouse_button(self, window, button, action, mods):
         """Handle mouse button clicks"""
@@ -492,6 +631,14 @@ class InputHandler:
 
     def handle_key(self, window, key, scancode, action, mods):
         """Handle keyboard input for puzzle"""
+        if key == Config.HUD_KEY and action == glfw.PRESS and self.hud:
+            self.hud.toggle()
+            return
+
+        if key == Config.PROFILE_KEY and action == glfw.PRESS and profiler.enabled:
+            profiler.export(Config.PROFILE_TRACE_PATH)
+            return
+
         if self.game.state != GameState.PUZZLE or action != glfw.PRESS:
             return
 
@@ -533,15 +680,25 @@ class EscapeRoom:
         self.camera = None
         self.player = None
         self.input_handler = None
-        self.shader = None
-        self.text_shader = None
+        self.shaders = None
         self.renderer = None
         self.cube = None
+        self.crate_mesh = None
         self.text_renderer = None
+        self.textures = None
         self.floor_texture = None
         self.wall_texture = None
         self.final_texture = None
-        self.image_shader = None
+        self.frame_uniforms = None
+        self.gpu_timer = None
+        self.resolution = None
+        self.pass_timer = None
+        self.hud = PerfHud(Config.FRAME_TIME_TARGET_MS)
+
+        # Scene graph
+        self.room = None
+        self.board_parts = None
+        self.crates = None
 
     def init_glfw(self):
         """Initialize GLFW and create window"""
@@ -554,16 +711,19 @@ class EscapeRoom:
         glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, GL_TRUE)
 
         monitor = glfw.get_primary_monitor()
-        video_mode = glfw.get_video_mode(monitor)
 
-        Config.WIDTH = video_mode.size.width
-        Config.HEIGHT = video_mode.size.height
+        if Config.RESOLUTION:
+            Config.WIDTH, Config.HEIGHT = Config.RESOLUTION
+        else:
+            video_mode = glfw.get_video_mode(monitor)
+            Config.WIDTH = video_mode.size.width
+            Config.HEIGHT = video_mode.size.height
 
         self.window = glfw.create_window(
             Config.WIDTH,
             Config.HEIGHT,
             "Escape Room - Board Puzzle",
-            monitor,  # Fullscreen
+            None if Config.WINDOWED else monitor,
             None
         )
 
@@ -572,80 +732,161 @@ class EscapeRoom:
             raise RuntimeError("Failed to create GLFW window")
 
         glfw.make_context_current(self.window)
+        glfw.swap_interval(1 if Config.VSYNC else 0)
 
+        # The framebuffer can differ from the requested size (HiDPI, mode switch)
+        Config.WIDTH, Config.HEIGHT = glfw.get_framebuffer_size(self.window)
         glViewport(0, 0, Config.WIDTH, Config.HEIGHT)
 
     def init_opengl(self):
         """Initialize OpenGL settings"""
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        gl_state.enable(GL_DEPTH_TEST)
+        gl_state.enable(GL_BLEND)
+        gl_state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
     def init_resources(self):
         """Load shaders, textures, and other resources"""
 
         # ===============================
-        # MAIN 3D SHADER
+        # SHARED FRAME UNIFORMS (camera, projection, light)
         # ===============================
-        self.shader = Shader("shaders/vertex.glsl", "shaders/fragment.glsl")
+        with profiler.scope("init: frame uniforms"):
+            self.frame_uniforms = FrameUniforms(Config.WIDTH, Config.HEIGHT)
+            self.frame_uniforms.set_light(glm.vec3(2.5, 3.5, 1.5), glm.vec3(1))
 
         # ===============================
-        # TEXT SHADER
+        # SHADERS (all variants compiled up front)
         # ===============================
-        self.text_shader = Shader(
-            "shaders/text_vertex.glsl",
-            "shaders/text_fragment.glsl"
-        )
-        self.text_shader.use()
+        with profiler.scope("init: shaders"):
+            self.shaders = ShaderLibrary()
 
-        projection = glm.ortho(
-            0.0, float(Config.WIDTH),
-            0.0, float(Config.HEIGHT)
-        )
-        self.text_shader.set_mat4("projection", projection)
-        self.text_shader.set_int("text", 0)
+            # Scene: lit variants of the shared vertex/fragment sources
+            self.shaders.add(
+                "lit_textured", "shaders/vertex.glsl", "shaders/fragment.glsl",
+                ("LIT", "TEXTURED")
+            )
+            self.shaders.add(
+                "lit_textured_instanced", "shaders/vertex.glsl", "shaders/fragment.glsl",
+                ("LIT", "TEXTURED", "INSTANCED")
+            )
+            self.shaders.add(
+                "lit_colored", "shaders/vertex.glsl", "shaders/fragment.glsl",
+                ("LIT",)
+            )
 
-        # ===============================
-        # IMAGE SHADER (🔥 MUST BE BEFORE RENDERER)
-        # ===============================
-        self.image_shader = Shader(
-            "shaders/image_vertex.glsl",
-            "shaders/image_fragment.glsl"
-        )
+            # UI: flat screen-space quads, no lighting
+            self.shaders.add(
+                "screen_colored", "shaders/vertex.glsl", "shaders/fragment.glsl",
+                ("SCREEN",)
+            )
+
+            # Text: distance-field glyphs (TextRenderer)
+            self.shaders.add(
+                "text", "shaders/text_vertex.glsl", "shaders/text_fragment.glsl",
+                ("SDF",)
+            )
+            self.shaders.add(
+                "image", "shaders/image_vertex.glsl", "shaders/image_fragment.glsl"
+            )
+
+            self.shaders.build()
+
+            Shader.binary_cache.report()
 
         # ===============================
         # MESH & CAMERA
         # ===============================
-        self.cube = CubeMesh()
-        self.camera = Camera(position=(0, Config.PLAYER_HEIGHT, 3))
-        self.player = PlayerController(self.camera, self.game)
-        self.input_handler = InputHandler(self.game, self.player)
+        with profiler.scope("init: mesh & camera"):
+            self.cube = CubeMesh()
+            self.crate_mesh = mesh_cache.load(Config.CRATE_MODEL)
+            self.camera = Camera(position=(0, Config.PLAYER_HEIGHT, 3))
+            self.player = PlayerController(self.camera, self.game)
+            self.input_handler = InputHandler(self.game, self.player, self.hud)
 
         # ===============================
-        # RENDERER (NOW image_shader IS VALID)
+        # RENDERER
         # ===============================
-        self.renderer = Renderer(self.shader, self.cube, self.image_shader)
+        with profiler.scope("init: renderer"):
+            self.renderer = Renderer(self.shaders, self.cube)
+
+            self.gpu_timer = GpuTimer()
+            self.pass_timer = PassTimer()
+            self.resolution = DynamicResolution(
+                Config.FRAME_TIME_TARGET_MS,
+                Config.MIN_RENDER_SCALE,
+                enabled=Config.DYNAMIC_RESOLUTION
+            )
+
+        with profiler.scope("init: scene"):
+            self.init_scene()
 
         # ===============================
         # TEXTURES
         # ===============================
-        self.floor_texture = TextureManager.load_texture(
-            "assets/textures/floor.jpg"
-        )
-        self.wall_texture = TextureManager.load_texture(
-            "assets/textures/wall.jpg"
-        )
-        self.final_texture = TextureManager.load_texture(
-            "assets/textures/final_image.jpg"
-        )
+        # Decoded in the background; each shows a placeholder until uploaded
+        with profiler.scope("init: textures"):
+            self.textures = AsyncTextureLoader()
+            self.floor_texture = self.textures.load(
+                "assets/textures/floor.jpg"
+            )
+            self.wall_texture = self.textures.load(
+                "assets/textures/wall.jpg"
+            )
+            self.final_texture = self.textures.load(
+                "assets/textures/final_image.jpg"
+            )
 
         # ===============================
         # TEXT RENDERER
         # ===============================
-        self.text_renderer = TextRenderer(
-            "fonts/about_font.TTF",
-            72
+        with profiler.scope("init: text renderer"):
+            self.text_renderer = TextRenderer(
+                "fonts/about_font.TTF",
+                72,
+                fallback_fonts=Config.FALLBACK_FONTS,
+                atlas_budget=Config.GLYPH_ATLAS_BUDGET
+            )
+
+            self.text_renderer.report_cache()
+
+    def init_scene(self):
+        """Build scene nodes; their matrices are cached until they move"""
+        # Room shell: only the inner faces of the floor slab and walls
+        # (inner wall faces at +-4.9, floor top at -0.9, walls up to 3)
+        builder = RoomBuilder(Config.TEXTURE_TILE_SIZE)
+        builder.add_box_interior(
+            (-4.9, -0.9, -4.9),
+            (4.9, 3.0, 4.9)
+        )
+        self.room = builder.build()
+
+        # Board parts are frustum-culled; the room shell always surrounds the camera
+        self.board_parts = CullingSet()
+
+        # Board: frame sits slightly behind the surface
+        board = SceneNode(self.game.board_pos)
+        board_frame = SceneNode(
+            glm.vec3(0, 0, -0.04),
+            self.game.board_size + glm.vec3(0.18, 0.18, 0.04),
+            parent=board
+        )
+        board_surface = SceneNode(
+            glm.vec3(0), self.game.board_size, parent=board
         )
+        self.board_parts.add(board_frame, (board_frame, glm.vec3(0.25, 0.18, 0.12)))      # dark wood
+        self.board_parts.add(board_surface, (board_surface, glm.vec3(0.85, 0.75, 0.55)))  # light wood
+
+        # Crates share one mesh (loaded from OBJ) and texture: a single instanced draw
+        self.crates = InstanceGroup()
+        floor_top = -0.9
+        for i, (x, z, height) in enumerate(Config.CRATE_STACKS):
+            for level in range(height):
+                y = floor_top + Config.CRATE_SIZE * (level + 0.5)
+                # Slightly different shades so neighbouring crates read apart
+                shade = 0.8 + 0.1 * ((i + level) % 3)
+                self.crates.add(SceneNode(
+                    (x, y, z), glm.vec3(Config.CRATE_SIZE), tint=glm.vec3(shade)
+                ))
 
     def setup_input(self):
         """Setup input callbacks"""
@@ -662,142 +903,164 @@ class EscapeRoom:
             lambda w, k, s, a, m: self.input_handler.handle_key(w, k, s, a, m)
         )
 
+        glfw.set_framebuffer_size_callback(
+            self.window,
+            lambda w, width, height: self.on_resize(width, height)
+        )
+
         glfw.set_cursor_pos_callback(
             self.window,
             lambda w, x, y: self.camera.process_mouse(x, y)
             if self.game.state == GameState.PLAYING else None
         )
 
-    def render_scene(self):
-        """Render the 3D scene"""
-        self.shader.use()
-        self.shader.set_vec3("lightPos", glm.vec3(2.5, 3.5, 1.5))
-        self.shader.set_vec3("lightColor", glm.vec3(1))
-        self.shader.set_vec3("viewPos", self.camera.position)
-
-        projection = glm.perspective(
-            glm.radians(60),
-            Config.WIDTH / Config.HEIGHT,
-            0.1, 100
-        )
-        self.shader.set_mat4("projection", projection)
-        self.shader.set_mat4("view", self.camera.get_view_matrix())
-
-        # Floor
-        self.renderer.draw_textured_cube(
-            glm.vec3(0, -1, 0),
-            glm.vec3(10, 0.2, 10),
-            self.floor_texture
-        )
+    def on_resize(self, width, height):
+        """Window/framebuffer size changed"""
+        if width == 0 or height == 0:
+            # Minimized
+            return
 
-        # Walls with level-specific tinting
-        level_tint = self.game.current_level.wall_color
-        self.shader.set_vec3("objectColor", level_tint)
+        Config.WIDTH, Config.HEIGHT = width, height
+        glViewport(0, 0, width, height)
 
-        # Back wall
-        self.renderer.draw_textured_cube(
-            glm.vec3(0, 1, -5),
-            glm.vec3(10, 4, 0.2),
-            self.wall_texture
-        )
+        self.frame_uniforms.resize(width, height)
+        self.renderer.resize(width, height)
 
-        # Front wall
-        self.renderer.draw_textured_cube(
-            glm.vec3(0, 1, 5),
-            glm.vec3(10, 4, 0.2),
-            self.wall_texture
-        )
+    def is_idle(self):
+        """Nothing moves on its own: block on input instead of spinning"""
+        # Minimized: nothing is drawn, so always wait; the loop still wakes
+        # every IDLE_TIMEOUT to poll the texture loader
+        if glfw.get_window_attrib(self.window, glfw.ICONIFIED):
+            return True
+        if self.textures.pending:
+            return False
+        if self.game.state == GameState.PUZZLE:
+            return True
+        return not glfw.get_window_attrib(self.window, glfw.FOCUSED)
+
+    def render_frame(self, alpha=1.0):
+        """Scene + UI; the frozen scene behind the puzzle panel is drawn once"""
+        self.renderer.begin_frame(self.camera.render_position(alpha))
+        self.renderer.queue.timer = self.pass_timer if self.hud.visible else None
+
+        glClearColor(0.08, 0.08, 0.12, 1)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        self.gpu_timer.begin()
+
+        with profiler.scope("render_scene"):
+            if self.game.state == GameState.PUZZLE and Config.PUZZLE_SCENE_CACHE:
+                if not self.renderer.scene_cached:
+                    self.renderer.capture_scene(
+                        lambda: self.render_scene(alpha), UIConfig.OVERLAY_ALPHA
+                    )
+                self.renderer.draw_scene_cache()
+            else:
+                # Any state change leaves the puzzle; re-capture on the way back in
+                self.renderer.invalidate_scene_cache()
+                self.renderer.begin_scene(
+                    *self.resolution.size(self.renderer.width, self.renderer.height)
+                )
+                self.render_scene(alpha)
+                self.renderer.end_scene()
+
+        with profiler.scope("render_ui"):
+            self.render_ui()
 
-        # Left wall
-        self.renderer.draw_textured_cube(
-            glm.vec3(-5, 1, 0),
-            glm.vec3(0.2, 4, 10),
-            self.wall_texture
-        )
+        self.gpu_timer.end()
+        self.resolution.update(self.gpu_timer.ms)
 
-        # Right wall
-        self.renderer.draw_textured_cube(
-            glm.vec3(5, 1, 0),
-            glm.vec3(0.2, 4, 10),
-            self.wall_texture
+    def render_scene(self, alpha=1.0):
+        """Render the 3D scene; `alpha` blends the last two simulation steps"""
+        view = self.camera.get_view_matrix(alpha)
+        self.frame_uniforms.update(view, self.camera.render_position(alpha))
+
+        # Floor + walls with level-specific tinting
+        self.renderer.draw_room(
+            self.room,
+            self.floor_texture,
+            self.wall_texture,
+            self.game.current_level.wall_color
         )
 
+        # Crates (wood, like the floor) in one instanced draw
+        self.renderer.draw_instanced(self.crate_mesh, self.floor_texture, self.crates)
+
         # Draw the puzzle board if visible
         if self.game.board_visible:
-            self.renderer.draw_board(
-                self.game.board_pos,
-                self.game.board_size
-            )
-
-    def render_ui(self):
-        """Render UI elements with proper OpenGL state isolation"""
-
-        # ============================================================
-        # CRITICAL: HARD RESET OpenGL STATE FOR UI RENDERING
-        # ============================================================
-        glDisable(GL_DEPTH_TEST)
-        glDisable(GL_CULL_FACE)
+            visible = self.board_parts.visible(self.frame_uniforms.projection * view)
+            self.renderer.draw_board(visible)
 
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-        glActiveTexture(GL_TEXTURE0)
+        # Sorted by shader/texture/depth; the pass sets depth/cull/blend state
+        self.renderer.flush(RenderQueue.OPAQUE)
+        self.renderer.flush(RenderQueue.TRANSPARENT)
 
+    def render_ui(self):
+        """Queue UI elements in draw order, then flush the UI pass"""
+        self.draw_ui()
+        if self.hud.visible:
+            self.hud.draw(self.renderer, self.text_renderer, Config.HEIGHT)
+        self.renderer.flush(RenderQueue.UI)
+
+    def draw_ui(self):
+        """Submit this frame's UI elements; later ones overlay earlier ones"""
         # ============================================================
         # Display final image fullscreen (overrides everything else)
         # ============================================================
         if self.game.show_final_image:
             self.renderer.draw_fullscreen_image(self.final_texture)
-            # Restore state before returning
-            glDisable(GL_BLEND)
-            glEnable(GL_DEPTH_TEST)
             return
 
         # ============================================================
         # PUZZLE UI
         # ============================================================
         if self.game.state == GameState.PUZZLE:
-            # Draw dark overlay
-            self.renderer.draw_dark_overlay(0.45)
+            # Draw dark overlay (already baked into the cached scene)
+            if not self.renderer.scene_cached:
+                self.renderer.draw_dark_overlay(UIConfig.OVERLAY_ALPHA)
             self.renderer.draw_ui_panel()
 
-            # ---- FORCE TEXT SHADER STATE (DO NOT RELY ON PREVIOUS CALLS) ----
-            ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-
-            self.text_shader.use()
-            self.text_shader.set_mat4("projection", ortho)
-            self.text_shader.set_int("text", 0)
-
             panel_center_x = Config.WIDTH / 2
             panel_center_y = Config.HEIGHT / 2
+            text_left = panel_center_x - UIConfig.PANEL_WIDTH / 2 + UIConfig.PANEL_PADDING
+            text_width = UIConfig.PANEL_WIDTH - 2 * UIConfig.PANEL_PADDING
 
             # Title
-            self.text_renderer.render_text(
-                self.text_shader,
+            self.renderer.draw_text(
+                self.text_renderer,
                 f"LEVEL {self.game.current_level.level_id}",
-                panel_center_x - 160,
+                panel_center_x,
                 panel_center_y + UIConfig.TITLE_Y_OFFSET,
-                1.6,
-                glm.vec3(1, 0.9, 0.2)
+                UIConfig.TITLE_SCALE,
+                glm.vec3(1, 0.9, 0.2),
+                align="center"
             )
 
-            # Question
-            self.text_renderer.render_text(
-                self.text_shader,
-                self.game.current_level.puzzle_question,
-                panel_center_x - 300,
-                panel_center_y + UIConfig.QUESTION_Y_OFFSET,
-                0.9,
-                glm.vec3(1, 1, 1)
+            # Question (wrapped to the panel; the answer goes below it)
+            question = self.game.current_level.puzzle_question
+            question_y = panel_center_y + UIConfig.QUESTION_Y_OFFSET
+            self.renderer.draw_text(
+                self.text_renderer,
+                question,
+                panel_center_x,
+                question_y,
+                UIConfig.QUESTION_SCALE,
+                glm.vec3(1, 1, 1),
+                max_width=text_width,
+                align="center"
+            )
+            _, question_height = self.text_renderer.measure(
+                question, UIConfig.QUESTION_SCALE, text_width
             )
 
             # Answer label
-            self.text_renderer.render_text(
-                self.text_shader,
+            label_y = question_y - question_height - UIConfig.LINE_GAP
+            self.renderer.draw_text(
+                self.text_renderer,
                 "Your Answer:",
-                panel_center_x - 300,
-                panel_center_y + UIConfig.ANSWER_LABEL_Y_OFFSET,
-                0.8,
+                text_left,
+                label_y,
+                UIConfig.LABEL_SCALE,
                 glm.vec3(0.7, 1, 0.7)
             )
 
@@ -805,12 +1068,12 @@ class EscapeRoom:
             cursor = "_" if self.game.cursor_visible else ""
             answer_text = self.game.current_answer + cursor
 
-            self.text_renderer.render_text(
-                self.text_shader,
+            self.renderer.draw_text(
+                self.text_renderer,
                 answer_text,
-                panel_center_x - 300,
-                panel_center_y + UIConfig.ANSWER_TEXT_Y_OFFSET,
-                1.0,
+                text_left,
+                label_y - self.text_renderer.line_height(UIConfig.ANSWER_SCALE) - UIConfig.LINE_GAP,
+                UIConfig.ANSWER_SCALE,
                 glm.vec3(0.2, 1, 0.2)
             )
 
@@ -818,13 +1081,6 @@ class EscapeRoom:
         # MESSAGE DISPLAY
         # ============================================================
         if self.game.show_message:
-            # ---- FORCE TEXT SHADER STATE AGAIN ----
-            ortho = glm.ortho(0, Config.WIDTH, 0, Config.HEIGHT)
-
-            self.text_shader.use()
-            self.text_shader.set_mat4("projection", ortho)
-            self.text_shader.set_int("text", 0)
-
             # Choose color based on message type
             if "Complete" in self.game.message_text:
                 color = glm.vec3(0.2, 1, 0.2)  # Green for success
@@ -833,13 +1089,15 @@ class EscapeRoom:
             else:
                 color = glm.vec3(1, 0.8, 0.2)  # Yellow for info
 
-            self.text_renderer.render_text(
-                self.text_shader,
+            self.renderer.draw_text(
+                self.text_renderer,
                 self.game.message_text,
-                Config.WIDTH / 2 - 180,
-                Config.HEIGHT / 2 - UIConfig.PANEL_HEIGHT / 2 - 50,
-                1.1,
-                color
+                Config.WIDTH / 2,
+                Config.HEIGHT / 2 - UIConfig.PANEL_HEIGHT / 2 + UIConfig.MESSAGE_Y_OFFSET,
+                UIConfig.MESSAGE_SCALE,
+                color,
+                max_width=UIConfig.PANEL_WIDTH,
+                align="center"
             )
 
         # ============================================================
@@ -848,42 +1106,67 @@ class EscapeRoom:
         if self.game.state == GameState.PLAYING:
             self.renderer.draw_crosshair()
 
-        # ============================================================
-        # --- Restore state ---
-        glDisable(GL_BLEND)
-        glEnable(GL_DEPTH_TEST)
-
     def run(self):
         """Main game loop"""
+        profiler.enabled = Config.PROFILE
+
         self.init_glfw()
         self.init_opengl()
         self.init_resources()
         self.setup_input()
 
-        last_time = time.time()
+        scheduler = FrameScheduler(Config.TICK_RATE, Config.FPS_CAP, Config.IDLE_TIMEOUT)
 
         while not glfw.window_should_close(self.window):
-            current_time = time.time()
-            delta_time = current_time - last_time
-            last_time = current_time
-
-            glfw.poll_events()
-
-            # Update game state
-            if self.game.state == GameState.PLAYING:
-                self.player.update(self.window, delta_time)
-
-            # Update timers and transitions
-            self.game.update(delta_time, self.camera, self.window)
-
-            # Render
-            glClearColor(0.08, 0.08, 0.12, 1)
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-            self.render_scene()
-            self.render_ui()
-
-            glfw.swap_buffers(self.window)
+            gl_state.begin_frame()
+            Shader.begin_frame()
+            with profiler.scope("poll events"):
+                scheduler.wait_events(self.is_idle())
+            scheduler.begin_frame()
+            cpu_start = time.perf_counter()
+
+            # Fixed-step simulation: movement and timers
+            for dt in scheduler.ticks():
+                self.camera.begin_tick()
+                if self.game.state == GameState.PLAYING:
+                    with profiler.scope("PlayerController.update"):
+                        self.player.update(self.window, dt)
+                with profiler.scope("Game.update"):
+                    self.game.update(dt, self.camera, self.window)
+
+            # Finished background loads; a frozen scene must be redrawn with them
+            with profiler.scope("texture uploads"):
+                if self.textures.update():
+                    self.renderer.invalidate_scene_cache()
+
+            # Nothing to show while minimized
+            if glfw.get_window_attrib(self.window, glfw.ICONIFIED):
+                continue
+
+            # Render, blended between the last two steps
+            self.render_frame(scheduler.alpha)
+
+            if self.hud.visible:
+                self.pass_timer.end_frame()
+                self.hud.record(
+                    scheduler.frame_time * 1000.0,
+                    (time.perf_counter() - cpu_start) * 1000.0,
+                    self.gpu_timer.ms,
+                    self.pass_timer,
+                    gl_state.draw_calls,
+                    Shader.programs
+                )
+
+            with profiler.scope("swap buffers"):
+                glfw.swap_buffers(self.window)
+            with profiler.scope("frame limiter"):
+                scheduler.end_frame()
+
+        self.text_renderer.save_cache()
+        self.textures.shutdown()
+
+        if profiler.enabled:
+            profiler.export(Config.PROFILE_TRACE_PATH)
 
         glfw.terminate()
 
@@ -1,78 +1,324 @@
+import ctypes
+import os
+
 import numpy as np
 from OpenGL.GL import *
 
+from gl_state import gl_state
 
-class CubeMesh:
-    def __init__(self):
-        # Position (3) + Normal (3)
-        self.vertices = np.array([
-            # Front
-            -0.5, -0.5,  0.5,   0, 0, 1,
-             0.5, -0.5,  0.5,   0, 0, 1,
-             0.5,  0.5,  0.5,   0, 0, 1,
-             0.5,  0.5,  0.5,   0, 0, 1,
-            -0.5,  0.5,  0.5,   0, 0, 1,
-            -0.5, -0.5,  0.5,   0, 0, 1,
-
-            # Back
-            -0.5, -0.5, -0.5,   0, 0, -1,
-            -0.5,  0.5, -0.5,   0, 0, -1,
-             0.5,  0.5, -0.5,   0, 0, -1,
-             0.5,  0.5, -0.5,   0, 0, -1,
-             0.5, -0.5, -0.5,   0, 0, -1,
-            -0.5, -0.5, -0.5,   0, 0, -1,
-
-            # Left
-            -0.5,  0.5,  0.5,  -1, 0, 0,
-            -0.5,  0.5, -0.5,  -1, 0, 0,
-            -0.5, -0.5, -0.5,  -1, 0, 0,
-            -0.5, -0.5, -0.5,  -1, 0, 0,
-            -0.5, -0.5,  0.5,  -1, 0, 0,
-            -0.5,  0.5,  0.5,  -1, 0, 0,
-
-            # Right
-             0.5,  0.5,  0.5,   1, 0, 0,
-             0.5, -0.5, -0.5,   1, 0, 0,
-             0.5,  0.5, -0.5,   1, 0, 0,
-             0.5, -0.5, -0.5,   1, 0, 0,
-             0.5,  0.5,  0.5,   1, 0, 0,
-             0.5, -0.5,  0.5,   1, 0, 0,
-
-            # Top
-            -0.5,  0.5, -0.5,   0, 1, 0,
-            -0.5,  0.5,  0.5,   0, 1, 0,
-             0.5,  0.5,  0.5,   0, 1, 0,
-             0.5,  0.5,  0.5,   0, 1, 0,
-             0.5,  0.5, -0.5,   0, 1, 0,
-            -0.5,  0.5, -0.5,   0, 1, 0,
-
-            # Bottom
-            -0.5, -0.5, -0.5,   0, -1, 0,
-             0.5, -0.5,  0.5,   0, -1, 0,
-            -0.5, -0.5,  0.5,   0, -1, 0,
-             0.5, -0.5,  0.5,   0, -1, 0,
-            -0.5, -0.5, -0.5,   0, -1, 0,
-             0.5, -0.5, -0.5,   0, -1, 0,
-        ], dtype=np.float32)
+
+class Mesh:
+    """Indexed triangle mesh.
+
+    Vertices are interleaved: position (3) + normal (3) + UV (2), which
+    matches attribute locations 0, 1 and 2 of shaders/vertex.glsl.
+    """
+
+    FLOATS_PER_VERTEX = 8
+    STRIDE = FLOATS_PER_VERTEX * 4
+
+    def __init__(self, vertices, indices):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, self.FLOATS_PER_VERTEX)
+
+        # 16-bit indices whenever they fit
+        if len(self.vertices) <= 0xFFFF:
+            self.indices = np.ascontiguousarray(indices, dtype=np.uint16)
+            self.index_type = GL_UNSIGNED_SHORT
+        else:
+            self.indices = np.ascontiguousarray(indices, dtype=np.uint32)
+            self.index_type = GL_UNSIGNED_INT
+
+        self.vertex_count = len(self.vertices)
+        self.index_count = len(self.indices)
 
         self.vao = glGenVertexArrays(1)
         self.vbo = glGenBuffers(1)
+        self.ebo = glGenBuffers(1)
 
-        glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl_state.bind_vertex_array(self.vao)
+
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
         glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
 
+        gl_state.bind_buffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+
+        self.bind_attributes()
+
+        gl_state.bind_vertex_array(0)
+
+    @classmethod
+    def from_corners(cls, corners):
+        """Build from a flat list of triangle corners, merging duplicates.
+
+        Each corner is a (px, py, pz, nx, ny, nz, u, v) tuple.
+        """
+        vertices, indices = deduplicate(corners)
+        return cls(vertices, indices)
+
+    def bind_attributes(self):
+        """Point the per-vertex attributes of the bound VAO at our buffers"""
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+
         # Position
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * 4, ctypes.c_void_p(0))
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(0))
         glEnableVertexAttribArray(0)
 
         # Normal
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * 4, ctypes.c_void_p(12))
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(12))
         glEnableVertexAttribArray(1)
 
-        glBindVertexArray(0)
+        # Texture coordinates
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, self.STRIDE, ctypes.c_void_p(24))
+        glEnableVertexAttribArray(2)
+
+        # Element buffer binding is recorded in the VAO
+        gl_state.bind_buffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+    def draw(self):
+        gl_state.bind_vertex_array(self.vao)
+        glDrawElements(GL_TRIANGLES, self.index_count, self.index_type, None)
+        gl_state.draw_calls += 1
+
+    def draw_range(self, first, count):
+        """Draw `count` indices starting at index `first`"""
+        gl_state.bind_vertex_array(self.vao)
+        glDrawElements(
+            GL_TRIANGLES, count, self.index_type,
+            ctypes.c_void_p(first * self.indices.itemsize)
+        )
+        gl_state.draw_calls += 1
+
+    def create_instance_buffer(self, capacity=16):
+        """New per-instance stream with its own VAO sharing this mesh's vertices"""
+        return InstanceBuffer(self, capacity)
+
+    def draw_instanced(self, vao, count):
+        gl_state.bind_vertex_array(vao)
+        glDrawElementsInstanced(GL_TRIANGLES, self.index_count, self.index_type, None, count)
+        gl_state.draw_calls += 1
+
+
+def deduplicate(corners):
+    """Collapse identical corners into one vertex; return (vertices, indices)"""
+    lookup = {}
+    vertices = []
+    indices = []
+
+    for corner in corners:
+        corner = tuple(corner)
+        index = lookup.get(corner)
+        if index is None:
+            index = len(vertices)
+            lookup[corner] = index
+            vertices.append(corner)
+        indices.append(index)
+
+    return (
+        np.array(vertices, dtype=np.float32).reshape(-1, Mesh.FLOATS_PER_VERTEX),
+        np.array(indices, dtype=np.uint32)
+    )
+
+
+class CubeMesh(Mesh):
+    """Unit cube centred on the origin, 24 vertices / 36 indices"""
+
+    # (normal, u axis, v axis) with u x v == normal, so corners are CCW
+    FACES = (
+        ((0, 0, 1), (1, 0, 0), (0, 1, 0)),     # Front
+        ((0, 0, -1), (-1, 0, 0), (0, 1, 0)),   # Back
+        ((-1, 0, 0), (0, 0, 1), (0, 1, 0)),    # Left
+        ((1, 0, 0), (0, 0, -1), (0, 1, 0)),    # Right
+        ((0, 1, 0), (1, 0, 0), (0, 0, -1)),    # Top
+        ((0, -1, 0), (1, 0, 0), (0, 0, 1)),    # Bottom
+    )
+
+    def __init__(self):
+        corners = []
+        for normal, u_axis, v_axis in self.FACES:
+            quad = []
+            for su, sv in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                position = [
+                    0.5 * (normal[i] + su * u_axis[i] + sv * v_axis[i])
+                    for i in range(3)
+                ]
+                quad.append((*position, *normal, (su + 1) / 2, (sv + 1) / 2))
+
+            corners += [quad[0], quad[1], quad[2], quad[0], quad[2], quad[3]]
+
+        vertices, indices = deduplicate(corners)
+        super().__init__(vertices, indices)
+
+
+# ======================================================
+# WAVEFRONT OBJ
+# ======================================================
+def _obj_index(token, count):
+    """OBJ indices are 1-based; negative ones count from the end"""
+    index = int(token)
+    return index - 1 if index > 0 else count + index
+
+
+def parse_obj(path):
+    """Parse an OBJ file into triangle corners (positions/normals/UVs).
+
+    Polygons are fan-triangulated; faces without normals get a flat
+    face normal, and missing UVs default to (0, 0).
+    """
+    positions = []
+    uvs = []
+    normals = []
+    corners = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+
+            tag = parts[0]
+            if tag == "v":
+                positions.append(tuple(float(x) for x in parts[1:4]))
+            elif tag == "vt":
+                uvs.append((float(parts[1]), float(parts[2]) if len(parts) > 2 else 0.0))
+            elif tag == "vn":
+                normals.append(tuple(float(x) for x in parts[1:4]))
+            elif tag == "f":
+                face = []
+                for token in parts[1:]:
+                    refs = token.split("/")
+                    v = _obj_index(refs[0], len(positions))
+                    t = _obj_index(refs[1], len(uvs)) if len(refs) > 1 and refs[1] else None
+                    n = _obj_index(refs[2], len(normals)) if len(refs) > 2 and refs[2] else None
+                    face.append((v, t, n))
+
+                for i in range(1, len(face) - 1):
+                    corners += _obj_triangle(
+                        (face[0], face[i], face[i + 1]), positions, uvs, normals
+                    )
+
+    return corners
+
+
+def _obj_triangle(triangle, positions, uvs, normals):
+    points = [np.array(positions[v], dtype=np.float32) for v, _, _ in triangle]
+
+    flat_normal = None
+    if any(n is None for _, _, n in triangle):
+        cross = np.cross(points[1] - points[0], points[2] - points[0])
+        length = np.linalg.norm(cross)
+        flat_normal = tuple(cross / length) if length > 0 else (0.0, 1.0, 0.0)
+
+    corners = []
+    for (v, t, n), point in zip(triangle, points):
+        normal = normals[n] if n is not None else flat_normal
+        uv = uvs[t] if t is not None else (0.0, 0.0)
+        corners.append((*positions[v], *normal, *uv))
+    return corners
+
+
+def load_obj(path):
+    return Mesh.from_corners(parse_obj(path))
+
+
+class MeshCache:
+    """Parses and uploads each model file once"""
+
+    def __init__(self):
+        self._meshes = {}
+
+    def load(self, path):
+        key = os.path.normcase(os.path.abspath(path))
+        mesh = self._meshes.get(key)
+        if mesh is None:
+            mesh = load_obj(path)
+            self._meshes[key] = mesh
+        return mesh
+
+    def clear(self):
+        self._meshes.clear()
+
+
+mesh_cache = MeshCache()
+
+
+class InstanceBuffer:
+    """Per-instance model matrix, normal matrix and tint for one mesh.
+
+    Owns a VAO that combines the mesh's vertex attributes with the
+    per-instance stream, so several groups of the same mesh can keep
+    their data resident on the GPU at once.
+    """
+
+    FLOATS_PER_INSTANCE = 16 + 9 + 3
+    STRIDE = FLOATS_PER_INSTANCE * 4
+
+    # Attribute locations used by the INSTANCED variant of shaders/vertex.glsl
+    MODEL_LOCATION = 3   # mat4 takes 3, 4, 5, 6
+    NORMAL_LOCATION = 7  # mat3 takes 7, 8, 9
+    TINT_LOCATION = 10
+
+    def __init__(self, mesh, capacity=16):
+        self.mesh = mesh
+        self.capacity = max(1, capacity)
+        self.count = 0
+        self.data = np.zeros((self.capacity, self.FLOATS_PER_INSTANCE), dtype=np.float32)
+
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+
+        gl_state.bind_vertex_array(self.vao)
+        mesh.bind_attributes()
+
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+
+        # Model matrix, one vec4 column per attribute slot
+        for column in range(4):
+            self._instance_attribute(self.MODEL_LOCATION + column, 4, column * 4)
+
+        # Normal matrix, one vec3 column per attribute slot
+        for column in range(3):
+            self._instance_attribute(self.NORMAL_LOCATION + column, 3, 16 + column * 3)
+
+        # Tint
+        self._instance_attribute(self.TINT_LOCATION, 3, 16 + 9)
+
+        gl_state.bind_vertex_array(0)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, 0)
+
+    def _instance_attribute(self, location, size, float_offset):
+        glEnableVertexAttribArray(location)
+        glVertexAttribPointer(
+            location, size, GL_FLOAT, GL_FALSE, self.STRIDE,
+            ctypes.c_void_p(float_offset * 4)
+        )
+        glVertexAttribDivisor(location, 1)
+
+    def upload(self, nodes):
+        """Write the nodes' cached matrices and tints (one GL upload)"""
+        count = len(nodes)
+
+        if count > self.capacity:
+            while self.capacity < count:
+                self.capacity *= 2
+            self.data = np.zeros((self.capacity, self.FLOATS_PER_INSTANCE), dtype=np.float32)
+            gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+
+        for i, node in enumerate(nodes):
+            # Raw glm memory is column-major, matching the attribute layout
+            self.data[i, :16] = np.frombuffer(node.model.to_bytes(), dtype=np.float32)
+            self.data[i, 16:25] = np.frombuffer(node.normal_matrix.to_bytes(), dtype=np.float32)
+            tint = node.tint
+            self.data[i, 25:] = (tint.x, tint.y, tint.z)
+
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, count * self.STRIDE, self.data[:count])
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, 0)
+
+        self.count = count
 
     def draw(self):
-        glBindVertexArray(self.vao)
-        glDrawArrays(GL_TRIANGLES, 0, 36)
-        glBindVertexArray(0)
+        if self.count:
+            self.mesh.draw_instanced(self.vao, self.count)
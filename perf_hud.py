@@ -0,0 +1,118 @@
+import glm
+
+
+class PerfHud:
+    """Toggleable performance overlay, drawn through the Renderer's UI pass.
+
+    Shows FPS, CPU/GPU frame time, CPU/GPU ms per render section (from a
+    PassTimer), draw calls, uniform uploads vs. skipped redundant ones per
+    program and a sparkline of recent frame times. Samples are only
+    recorded while the HUD is visible.
+    """
+
+    HISTORY = 90            # frames in the sparkline
+    TEXT_SCALE = 0.3
+    LINE_HEIGHT = 26
+    MARGIN = 16
+    BAR_WIDTH = 3
+    GRAPH_HEIGHT = 60
+    GRAPH_MIN_MS = 1000.0 / 30  # graph is at least this tall (in ms)
+
+    TEXT_COLOR = glm.vec3(0.9, 1.0, 0.9)
+    SECTION_COLOR = glm.vec3(0.7, 0.8, 1.0)
+    BAR_COLOR = glm.vec3(0.3, 0.9, 0.4)
+    SLOW_BAR_COLOR = glm.vec3(1.0, 0.4, 0.3)
+
+    def __init__(self, target_ms=1000.0 / 60):
+        self.visible = False
+        self.target_ms = target_ms
+
+        # Ring buffer of frame times
+        self.frame_times = [0.0] * self.HISTORY
+        self.count = 0
+
+        self.fps = 0.0
+        self.cpu_ms = 0.0
+        self.gpu_ms = None
+        self.draw_calls = 0
+        self.sections = []
+        self.uniforms = []
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.count = 0
+
+    def record(self, frame_ms, cpu_ms, gpu_ms, pass_timer, draw_calls, programs=()):
+        """Store one frame's numbers (pass_timer results lag a frame)"""
+        self.frame_times[self.count % self.HISTORY] = frame_ms
+        self.count += 1
+
+        if frame_ms > 0:
+            fps = 1000.0 / frame_ms
+            self.fps = fps if self.count == 1 else self.fps + (fps - self.fps) * 0.1
+
+        self.cpu_ms = cpu_ms
+        self.gpu_ms = gpu_ms
+        self.draw_calls = draw_calls
+        self.sections = [
+            (name, pass_timer.cpu_ms.get(name, 0.0), gpu)
+            for name, gpu in pass_timer.gpu_ms.items()
+        ]
+        # Programs used this frame (their stats are reset every frame)
+        self.uniforms = [
+            (shader.name, shader.stats["uploads"], shader.stats["skipped"])
+            for shader in programs
+            if shader.stats["uploads"] or shader.stats["skipped"]
+        ]
+
+    def lines(self):
+        gpu = f"{self.gpu_ms:.2f}" if self.gpu_ms is not None else "--"
+        lines = [
+            (f"FPS {self.fps:.0f}   CPU {self.cpu_ms:.2f} ms   GPU {gpu} ms", self.TEXT_COLOR),
+            (f"Draw calls {self.draw_calls}", self.TEXT_COLOR),
+        ]
+        for name, cpu, gpu in self.sections:
+            lines.append((f"  {name}: cpu {cpu:.2f} / gpu {gpu:.2f} ms", self.SECTION_COLOR))
+
+        uploads = sum(count for _, count, _ in self.uniforms)
+        skipped = sum(count for _, _, count in self.uniforms)
+        lines.append((f"Uniforms {uploads} set / {skipped} skipped", self.TEXT_COLOR))
+        for name, uploads, skipped in self.uniforms:
+            lines.append((f"  {name}: {uploads} / {skipped}", self.SECTION_COLOR))
+        return lines
+
+    def draw(self, renderer, text_renderer, screen_height):
+        """Queue the HUD (text top-left, sparkline below it)"""
+        y = screen_height - self.MARGIN - self.LINE_HEIGHT
+
+        for text, color in self.lines():
+            renderer.draw_text(
+                text_renderer, text, self.MARGIN, y, self.TEXT_SCALE, color, label="hud"
+            )
+            y -= self.LINE_HEIGHT
+
+        self.draw_sparkline(renderer, self.MARGIN, y - self.GRAPH_HEIGHT)
+
+    def draw_sparkline(self, renderer, x, y):
+        samples = min(self.count, self.HISTORY)
+        if not samples:
+            return
+
+        width = self.HISTORY * self.BAR_WIDTH
+        renderer.draw_rect(x, y, width, self.GRAPH_HEIGHT, glm.vec3(0), 0.5, "hud")
+
+        # Oldest sample on the left
+        start = self.count - samples
+        times = [self.frame_times[i % self.HISTORY] for i in range(start, self.count)]
+        scale = self.GRAPH_HEIGHT / max(self.GRAPH_MIN_MS, max(times))
+
+        # Frame budget line
+        budget_y = y + min(self.target_ms * scale, self.GRAPH_HEIGHT)
+        renderer.draw_rect(x, budget_y, width, 1, glm.vec3(1), 0.4, "hud")
+
+        for i, frame_ms in enumerate(times):
+            color = self.SLOW_BAR_COLOR if frame_ms > self.target_ms else self.BAR_COLOR
+            renderer.draw_rect(
+                x + i * self.BAR_WIDTH, y, self.BAR_WIDTH - 1,
+                max(1.0, frame_ms * scale), color, 0.9, "hud"
+            )
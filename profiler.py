@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from array import array
+from contextlib import nullcontext
+
+
+class _Scope:
+    """Reusable `with` block for one marker name (no allocation per use)"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    """CPU timing markers kept in a preallocated ring buffer.
+
+    `with profiler.scope("name"):` records one span; once `capacity`
+    spans are stored the oldest are overwritten. `export()` writes
+    Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev). While
+    disabled, `scope()` hands back one shared no-op context, so markers
+    can stay in hot code.
+    """
+
+    def __init__(self, capacity=65536, enabled=False):
+        self.capacity = capacity
+        self.enabled = enabled
+
+        self._names = [None] * capacity
+        self._threads = [0] * capacity
+        self._starts = array("d", bytes(8 * capacity))
+        self._ends = array("d", bytes(8 * capacity))
+        self._count = 0
+
+        self._scopes = {}
+        self._null_scope = nullcontext()
+        self._origin = time.perf_counter()
+
+    def scope(self, name):
+        if not self.enabled:
+            return self._null_scope
+
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, name)
+        return scope
+
+    def record(self, name, start, end):
+        i = self._count % self.capacity
+        self._names[i] = name
+        self._threads[i] = threading.get_ident()
+        self._starts[i] = start
+        self._ends[i] = end
+        self._count += 1
+
+    def clear(self):
+        self._count = 0
+
+    def events(self):
+        """Recorded spans, oldest first, as Chrome "complete" events"""
+        stored = min(self._count, self.capacity)
+        first = self._count - stored
+
+        events = []
+        for n in range(first, self._count):
+            i = n % self.capacity
+            start = self._starts[i]
+            events.append({
+                "name": self._names[i],
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (self._ends[i] - start) * 1e6,
+                "pid": 1,
+                "tid": self._threads[i],
+            })
+        return events
+
+    def export(self, path):
+        """Dump the buffer as a Chrome trace file"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+
+        print(f"📈 Profile: {min(self._count, self.capacity)} span(s) written to {path}")
+
+
+# One profiler per process, like the GL state tracker
+profiler = Profiler()
@@ -0,0 +1,130 @@
+from OpenGL.GL import *
+
+from gl_state import gl_state
+
+
+class RenderQueue:
+    """Draw packets collected per pass, then sorted and flushed together.
+
+    A packet is a shader, an optional texture, a view depth and a
+    `draw()` callback that sets per-draw uniforms and issues the call.
+    Sort keys per pass:
+
+    - OPAQUE: shader, texture, then front-to-back (fewest switches, early-Z)
+    - TRANSPARENT: back-to-front, then shader/texture
+    - UI: submission order (later elements overlay earlier ones)
+
+    `stats` counts the current frame, `last_frame` the previous one.
+    Packets carry a section label; with a `timer` (PassTimer) attached,
+    each run of same-labelled packets is timed as one section.
+    """
+
+    OPAQUE = 0
+    TRANSPARENT = 1
+    UI = 2
+
+    PASSES = (OPAQUE, TRANSPARENT, UI)
+
+    def __init__(self):
+        self._packets = {render_pass: [] for render_pass in self.PASSES}
+        self._sequence = 0
+        self.timer = None
+        self.stats = self._empty_stats()
+        self.last_frame = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats():
+        return {"packets": 0, "program_changes": 0, "texture_changes": 0}
+
+    def begin_frame(self):
+        self.last_frame = self.stats
+        self.stats = self._empty_stats()
+
+    # =============================
+    # SUBMISSION
+    # =============================
+    def submit(self, render_pass, shader, draw, texture=0, depth=0.0, label="draw"):
+        """Queue `draw()` to run with `shader` bound (and `texture` on unit 0)"""
+        # The sequence number keeps sorting stable and never compares callbacks
+        self._sequence += 1
+
+        if render_pass == self.OPAQUE:
+            key = (shader.id, texture, depth, self._sequence)
+        elif render_pass == self.TRANSPARENT:
+            key = (-depth, shader.id, texture, self._sequence)
+        else:
+            key = (self._sequence,)
+
+        self._packets[render_pass].append((key, shader, texture, draw, label))
+
+    # =============================
+    # TIMED SECTIONS
+    # =============================
+    def begin_section(self, label):
+        if self.timer is not None:
+            self.timer.begin(label)
+
+    def end_section(self):
+        if self.timer is not None:
+            self.timer.end()
+
+    # =============================
+    # FLUSHING
+    # =============================
+    def _set_pass_state(self, render_pass):
+        if render_pass == self.OPAQUE:
+            gl_state.enable(GL_DEPTH_TEST)
+            gl_state.enable(GL_CULL_FACE)
+            gl_state.depth_mask(True)
+            gl_state.disable(GL_BLEND)
+            return
+
+        gl_state.enable(GL_BLEND)
+        gl_state.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        if render_pass == self.TRANSPARENT:
+            # Test against opaque depth, but don't occlude each other
+            gl_state.enable(GL_DEPTH_TEST)
+            gl_state.depth_mask(False)
+        else:
+            gl_state.disable(GL_DEPTH_TEST)
+            gl_state.disable(GL_CULL_FACE)
+
+    def flush(self, render_pass):
+        """Sort and draw everything queued for `render_pass`"""
+        packets = self._packets[render_pass]
+        if not packets:
+            return
+
+        packets.sort(key=lambda packet: packet[0])
+        self._set_pass_state(render_pass)
+
+        current_shader = None
+        current_texture = None
+        current_label = None
+
+        for _, shader, texture, draw, label in packets:
+            if label != current_label:
+                self.begin_section(label)
+                current_label = label
+
+            if shader is not current_shader:
+                self.stats["program_changes"] += 1
+                current_shader = shader
+            shader.use()
+
+            # Texture 0 means the packet binds its own (or needs none)
+            if texture:
+                if texture != current_texture:
+                    self.stats["texture_changes"] += 1
+                    current_texture = texture
+                gl_state.bind_texture(texture)
+
+            draw()
+
+        self.end_section()
+        self.stats["packets"] += len(packets)
+        packets.clear()
+
+        # Leave depth writes on so the next frame's glClear clears depth
+        gl_state.depth_mask(True)
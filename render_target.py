@@ -0,0 +1,78 @@
+from OpenGL.GL import *
+
+from gl_state import gl_state
+
+
+class RenderTarget:
+    """Offscreen framebuffer: a color texture plus a depth renderbuffer.
+
+    Storage is allocated lazily by `resize()` and only reallocated when
+    the size actually changes.
+    """
+
+    def __init__(self, width=0, height=0):
+        self.fbo = glGenFramebuffers(1)
+        self.color = glGenTextures(1)
+        self.depth = glGenRenderbuffers(1)
+        self.width = 0
+        self.height = 0
+
+        gl_state.bind_texture(self.color)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+
+        if width and height:
+            self.resize(width, height)
+
+    def resize(self, width, height):
+        width, height = max(1, int(width)), max(1, int(height))
+        if (width, height) == (self.width, self.height):
+            return
+
+        self.width, self.height = width, height
+
+        gl_state.bind_texture(self.color)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0,
+            GL_RGBA, GL_UNSIGNED_BYTE, None
+        )
+
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        gl_state.bind_framebuffer(self.fbo)
+        glFramebufferTexture2D(
+            GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.color, 0
+        )
+        glFramebufferRenderbuffer(
+            GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, self.depth
+        )
+
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"❌ Render target incomplete (status 0x{int(status):X})")
+
+    def bind(self):
+        """Draw into this target, covering all of it"""
+        gl_state.bind_framebuffer(self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    def blit_to(self, framebuffer, width, height, filter=GL_LINEAR):
+        """Copy (and scale) the color buffer onto another framebuffer"""
+        gl_state.bind_framebuffer(framebuffer)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.fbo)
+        glBlitFramebuffer(
+            0, 0, self.width, self.height,
+            0, 0, width, height,
+            GL_COLOR_BUFFER_BIT, filter
+        )
+        # Reads follow draws again (the tracker only binds both at once)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, framebuffer)
+
+    def delete(self):
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteTextures(1, [self.color])
+        glDeleteRenderbuffers(1, [self.depth])
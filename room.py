@@ -0,0 +1,80 @@
+import glm
+
+from mesh import Mesh, deduplicate
+
+
+class RoomGeometry:
+    """One static mesh for a whole room, split into per-material index ranges"""
+
+    def __init__(self, mesh, ranges):
+        self.mesh = mesh
+        # material name -> (first index, index count)
+        self.ranges = ranges
+
+    def draw(self, material):
+        first, count = self.ranges.get(material, (0, 0))
+        if count:
+            self.mesh.draw_range(first, count)
+
+
+class RoomBuilder:
+    """Emits only the inward-facing quads of a room's floor and walls.
+
+    Everything goes into one vertex/index buffer; quads are grouped by
+    material so each material is a single contiguous draw. UVs are in
+    world units divided by `tile_size`, so textures repeat at the same
+    density on every surface.
+    """
+
+    def __init__(self, tile_size=2.0):
+        self.tile_size = tile_size
+        self._materials = {}
+
+    def add_quad(self, material, corner, u_edge, v_edge):
+        """Quad spanning corner..corner+u+v; faces along cross(u, v)"""
+        corner = glm.vec3(corner)
+        u_edge = glm.vec3(u_edge)
+        v_edge = glm.vec3(v_edge)
+        normal = glm.normalize(glm.cross(u_edge, v_edge))
+
+        u_repeat = glm.length(u_edge) / self.tile_size
+        v_repeat = glm.length(v_edge) / self.tile_size
+
+        quad = []
+        for su, sv in ((0, 0), (1, 0), (1, 1), (0, 1)):
+            position = corner + u_edge * su + v_edge * sv
+            quad.append((
+                position.x, position.y, position.z,
+                normal.x, normal.y, normal.z,
+                su * u_repeat, sv * v_repeat
+            ))
+
+        corners = self._materials.setdefault(material, [])
+        corners += [quad[0], quad[1], quad[2], quad[0], quad[2], quad[3]]
+
+    def add_box_interior(self, box_min, box_max, floor="floor", walls="walls", ceiling=None):
+        """Floor, four walls and (optionally) ceiling of a box, seen from inside"""
+        x0, y0, z0 = box_min
+        x1, y1, z1 = box_max
+        dx, dy, dz = x1 - x0, y1 - y0, z1 - z0
+
+        if floor:
+            self.add_quad(floor, (x0, y0, z0), (0, 0, dz), (dx, 0, 0))
+        if ceiling:
+            self.add_quad(ceiling, (x0, y1, z0), (dx, 0, 0), (0, 0, dz))
+
+        if walls:
+            self.add_quad(walls, (x0, y0, z0), (dx, 0, 0), (0, dy, 0))    # Back
+            self.add_quad(walls, (x1, y0, z1), (-dx, 0, 0), (0, dy, 0))   # Front
+            self.add_quad(walls, (x0, y0, z1), (0, 0, -dz), (0, dy, 0))   # Left
+            self.add_quad(walls, (x1, y0, z0), (0, 0, dz), (0, dy, 0))    # Right
+
+    def build(self):
+        corners = []
+        ranges = {}
+        for material, material_corners in self._materials.items():
+            ranges[material] = (len(corners), len(material_corners))
+            corners += material_corners
+
+        vertices, indices = deduplicate(corners)
+        return RoomGeometry(Mesh(vertices, indices), ranges)
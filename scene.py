@@ -0,0 +1,167 @@
+import glm
+
+
+class SceneNode:
+    """A transform in the scene graph with cached world/normal matrices.
+
+    Matrices are rebuilt lazily, and only after `position` or `scale`
+    (of this node or any parent) has changed.
+    """
+
+    # Meshes are unit cubes unless told otherwise
+    UNIT_BOUNDS = (glm.vec3(-0.5), glm.vec3(0.5))
+
+    def __init__(self, position=(0, 0, 0), scale=(1, 1, 1), tint=None, parent=None,
+                 local_bounds=None):
+        self._position = glm.vec3(position)
+        self._scale = glm.vec3(scale)
+        self._tint = glm.vec3(tint) if tint is not None else glm.vec3(1)
+
+        self.parent = None
+        self.children = []
+
+        self._model = glm.mat4(1.0)
+        self._normal_matrix = glm.mat3(1.0)
+        self._world_bounds = None
+        self._dirty = True
+
+        self.local_bounds = local_bounds or self.UNIT_BOUNDS
+
+        # Bumped on every change; lets batches detect stale uploads cheaply
+        self.version = 0
+
+        if parent is not None:
+            parent.add_child(self)
+
+    # =============================
+    # HIERARCHY
+    # =============================
+    def add_child(self, node):
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = self
+        self.children.append(node)
+        node.mark_dirty()
+        return node
+
+    def mark_dirty(self):
+        self.version += 1
+        if self._dirty:
+            # Children were already flagged when this node became dirty
+            return
+        self._dirty = True
+        for child in self.children:
+            child.mark_dirty()
+
+    # =============================
+    # PROPERTIES
+    # =============================
+    @property
+    def position(self):
+        return glm.vec3(self._position)
+
+    @position.setter
+    def position(self, value):
+        value = glm.vec3(value)
+        if value != self._position:
+            self._position = value
+            self.mark_dirty()
+
+    @property
+    def scale(self):
+        return glm.vec3(self._scale)
+
+    @scale.setter
+    def scale(self, value):
+        value = glm.vec3(value)
+        if value != self._scale:
+            self._scale = value
+            self.mark_dirty()
+
+    @property
+    def tint(self):
+        return self._tint
+
+    @tint.setter
+    def tint(self, value):
+        value = glm.vec3(value)
+        if value != self._tint:
+            self._tint = value
+            # Tint doesn't affect matrices, only uploaded instance data
+            self.version += 1
+
+    # =============================
+    # CACHED MATRICES
+    # =============================
+    def _update(self):
+        if not self._dirty:
+            return
+
+        local = glm.translate(glm.mat4(1.0), self._position)
+        local = glm.scale(local, self._scale)
+
+        if self.parent is not None:
+            self._model = self.parent.model * local
+        else:
+            self._model = local
+
+        self._normal_matrix = glm.transpose(glm.inverse(glm.mat3(self._model)))
+        self._world_bounds = None
+        self._dirty = False
+
+    @property
+    def model(self):
+        self._update()
+        return self._model
+
+    @property
+    def normal_matrix(self):
+        self._update()
+        return self._normal_matrix
+
+    @property
+    def world_bounds(self):
+        """World-space AABB (min, max) of `local_bounds`"""
+        self._update()
+        if self._world_bounds is None:
+            local_min, local_max = self.local_bounds
+            center = glm.vec3(self._model * glm.vec4((local_min + local_max) * 0.5, 1.0))
+            half = (local_max - local_min) * 0.5
+
+            # Extent along each world axis = |M| * half (M: upper 3x3, column-major)
+            m = glm.mat3(self._model)
+            extent = glm.vec3(
+                abs(m[0].x) * half.x + abs(m[1].x) * half.y + abs(m[2].x) * half.z,
+                abs(m[0].y) * half.x + abs(m[1].y) * half.y + abs(m[2].y) * half.z,
+                abs(m[0].z) * half.x + abs(m[1].z) * half.y + abs(m[2].z) * half.z,
+            )
+            self._world_bounds = (center - extent, center + extent)
+        return self._world_bounds
+
+
+class InstanceGroup:
+    """Nodes drawn together with one mesh, one texture and one draw call.
+
+    The instance buffer is only re-uploaded when a member node changed.
+    """
+
+    def __init__(self, nodes=None):
+        self.nodes = list(nodes or [])
+        self.buffer = None
+        self._uploaded_versions = None
+
+    def add(self, node):
+        self.nodes.append(node)
+        return node
+
+    def sync(self, mesh):
+        """Make sure the GPU copy matches the nodes; return the buffer"""
+        if self.buffer is None:
+            self.buffer = mesh.create_instance_buffer(len(self.nodes))
+
+        versions = tuple(node.version for node in self.nodes)
+        if versions != self._uploaded_versions:
+            self.buffer.upload(self.nodes)
+            self._uploaded_versions = versions
+
+        return self.buffer
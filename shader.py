@@ -1,109 +1,397 @@
+import ctypes
+import os
+import re
+
 from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_2_0 import glGetProgramiv as _raw_glGetProgramiv
 import glm
 
+from gl_state import gl_state
+from frame_uniforms import FrameUniforms
+from shader_cache import ProgramBinaryCache
+
+try:
+    from OpenGL.GL.KHR.parallel_shader_compile import (
+        glMaxShaderCompilerThreadsKHR,
+        GL_COMPLETION_STATUS_KHR,
+    )
+except ImportError:  # older PyOpenGL
+    glMaxShaderCompilerThreadsKHR = None
+    GL_COMPLETION_STATUS_KHR = 0x91B1
+
+# Set by ShaderLibrary.build() when the driver compiles in the background
+_PARALLEL_COMPILE = False
+
+
+# ==================================================
+# PREPROCESSOR
+# ==================================================
+_INCLUDE = re.compile(r'^\s*#\s*include\s+"([^"]+)"\s*$')
+
+
+def _normalize_defines(defines):
+    """Accept names or a name -> value mapping; return a sorted dict"""
+    if not defines:
+        return {}
+    if not isinstance(defines, dict):
+        defines = {name: 1 for name in defines}
+    return dict(sorted(defines.items()))
+
+
+def _read_source(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"❌ Shader file not found: {path}")
+
+
+def _expand_includes(path: str, stack=()) -> list:
+    if path in stack:
+        raise RuntimeError(f"❌ Shader include cycle: {' -> '.join(stack + (path,))}")
+
+    lines = []
+    for number, line in enumerate(_read_source(path).splitlines(), start=1):
+        match = _INCLUDE.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+
+        include_path = os.path.join(os.path.dirname(path), match.group(1))
+        lines.append(f"// begin {match.group(1)}")
+        lines.extend(_expand_includes(include_path, stack + (path,)))
+        lines.append(f"// end {match.group(1)}")
+        # Keep compiler line numbers pointing into this file
+        lines.append(f"#line {number + 1}")
+
+    return lines
+
+
+def preprocess(path: str, defines=None) -> str:
+    """Resolve `#include "file"` and inject `#define`s after `#version`"""
+    lines = _expand_includes(path)
+    defines = _normalize_defines(defines)
+
+    if defines:
+        version_index = next(
+            (i for i, line in enumerate(lines) if line.strip().startswith("#version")),
+            -1
+        )
+        injected = [f"#define {name} {value}" for name, value in defines.items()]
+        injected.append(f"#line {version_index + 2}")
+        lines[version_index + 1:version_index + 1] = injected
+
+    return "\n".join(lines) + "\n"
+
+
+# ==================================================
+# UNIFORM SETTERS
+# ==================================================
+def _upload_int(location, value):
+    glUniform1i(location, value)
+
+
+def _upload_float(location, value):
+    glUniform1f(location, value)
+
+
+def _upload_vec2(location, value):
+    glUniform2f(location, value.x, value.y)
+
+
+def _upload_vec3(location, value):
+    glUniform3f(location, value.x, value.y, value.z)
+
+
+def _upload_vec4(location, value):
+    glUniform4f(location, value.x, value.y, value.z, value.w)
+
+
+def _upload_mat3(location, value):
+    glUniformMatrix3fv(location, 1, GL_FALSE, glm.value_ptr(value))
+
+
+def _upload_mat4(location, value):
+    glUniformMatrix4fv(location, 1, GL_FALSE, glm.value_ptr(value))
+
+
+# GL type -> (converter/copy, upload)
+_UNIFORM_TYPES = {
+    GL_INT: (int, _upload_int),
+    GL_BOOL: (int, _upload_int),
+    GL_SAMPLER_2D: (int, _upload_int),
+    GL_FLOAT: (float, _upload_float),
+    GL_FLOAT_VEC2: (glm.vec2, _upload_vec2),
+    GL_FLOAT_VEC3: (glm.vec3, _upload_vec3),
+    GL_FLOAT_VEC4: (glm.vec4, _upload_vec4),
+    GL_FLOAT_MAT3: (glm.mat3, _upload_mat3),
+    GL_FLOAT_MAT4: (glm.mat4, _upload_mat4),
+}
+
+
+class Uniform:
+    """Typed setter for one active uniform.
+
+    Shadows the last value uploaded to the program so repeated uploads
+    of the same value never reach the driver.
+    """
+
+    def __init__(self, shader, name, location, gl_type):
+        self.shader = shader
+        self.name = name
+        self.location = location
+        self.gl_type = gl_type
+        self.convert, self._upload = _UNIFORM_TYPES[gl_type]
+        self.value = None
+
+    def set(self, value):
+        # Converting also copies glm values, so later in-place edits
+        # by the caller can't alias the shadow copy
+        value = self.convert(value)
+        if self.value is not None and self.value == value:
+            self.shader.stats["skipped"] += 1
+            return
+
+        self._upload(self.location, value)
+        self.value = value
+        self.shader.stats["uploads"] += 1
+
 
 class Shader:
-    def __init__(self, vertex_path: str, fragment_path: str):
+    # Every linked program, for stats reporting
+    programs = []
+
+    # Linked binaries persisted across launches
+    binary_cache = ProgramBinaryCache()
+
+    # Uniform blocks shared between programs -> binding point
+    BLOCK_BINDINGS = {FrameUniforms.NAME: FrameUniforms.BINDING}
+
+    def __init__(self, vertex_path: str, fragment_path: str, defines=None, deferred=False):
+        """Build a program from two GLSL files.
+
+        `defines` (names, or a name -> value dict) selects a variant.
+        With `deferred=True` compilation is only started; call finish()
+        before use, which lets the driver compile several programs at once.
+        """
         self.id = glCreateProgram()
-        self._uniform_cache = {}
+        self.name = vertex_path
+        self.defines = _normalize_defines(defines)
+        if self.defines:
+            self.name += " [" + " ".join(self.defines) + "]"
+
+        self.uniforms = {}
+        self._missing_uniforms = set()
+        self.stats = {"uploads": 0, "skipped": 0}
+        self._pending = None
 
         # =============================
-        # Load shader sources
+        # Load + preprocess shader sources
         # =============================
-        vertex_src = self._load_file(vertex_path)
-        fragment_src = self._load_file(fragment_path)
+        self.vertex_path = vertex_path
+        self.fragment_path = fragment_path
+        vertex_src = preprocess(vertex_path, self.defines)
+        fragment_src = preprocess(fragment_path, self.defines)
 
         # =============================
-        # Compile shaders
+        # Cached binary, else compile + link
         # =============================
-        vertex_shader = self._compile_shader(
-            vertex_src, GL_VERTEX_SHADER, vertex_path
-        )
-        fragment_shader = self._compile_shader(
-            fragment_src, GL_FRAGMENT_SHADER, fragment_path
-        )
+        self._cache_key = self.binary_cache.key(vertex_src, fragment_src)
+        if not self.binary_cache.load(self.id, self._cache_key):
+            self._start_compile_and_link(vertex_src, fragment_src)
+
+        if not deferred:
+            self.finish()
+
+    def finish(self):
+        """Wait for the link to complete, then reflect uniforms"""
+        if self._pending is not None:
+            self._finish_link()
 
         # =============================
-        # Link program
+        # Shared uniform blocks
         # =============================
-        glAttachShader(self.id, vertex_shader)
-        glAttachShader(self.id, fragment_shader)
-        glLinkProgram(self.id)
+        for block_name, binding in self.BLOCK_BINDINGS.items():
+            index = glGetUniformBlockIndex(self.id, block_name)
+            if index != GL_INVALID_INDEX:
+                glUniformBlockBinding(self.id, index, binding)
 
-        if not glGetProgramiv(self.id, GL_LINK_STATUS):
-            error = glGetProgramInfoLog(self.id).decode()
-            raise RuntimeError(f"❌ Shader link error:\n{error}")
+        self._reflect_uniforms()
+        Shader.programs.append(self)
 
-        glDeleteShader(vertex_shader)
-        glDeleteShader(fragment_shader)
+    @property
+    def ready(self):
+        """True once a deferred link is done (needs KHR_parallel_shader_compile)"""
+        if self._pending is None or not _PARALLEL_COMPILE:
+            return True
+        # PyOpenGL's wrapper doesn't know this pname's size; use the raw entry point
+        status = GLint(0)
+        _raw_glGetProgramiv(self.id, GL_COMPLETION_STATUS_KHR, ctypes.byref(status))
+        return bool(status.value)
 
     # ==================================================
     # INTERNAL HELPERS
     # ==================================================
-    def _load_file(self, path: str) -> str:
+    def _start_compile_and_link(self, vertex_src, fragment_src):
+        # No status queries here: querying would block on the driver
+        vertex_shader = glCreateShader(GL_VERTEX_SHADER)
+        glShaderSource(vertex_shader, vertex_src)
+        glCompileShader(vertex_shader)
+
+        fragment_shader = glCreateShader(GL_FRAGMENT_SHADER)
+        glShaderSource(fragment_shader, fragment_src)
+        glCompileShader(fragment_shader)
+
+        glAttachShader(self.id, vertex_shader)
+        glAttachShader(self.id, fragment_shader)
+        self.binary_cache.prepare(self.id)
+        glLinkProgram(self.id)
+
+        self._pending = (vertex_shader, fragment_shader)
+
+    def _finish_link(self):
+        vertex_shader, fragment_shader = self._pending
+        self._pending = None
+
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            raise FileNotFoundError(f"❌ Shader file not found: {path}")
+            if not glGetProgramiv(self.id, GL_LINK_STATUS):
+                # Report the compile error first if there is one
+                self._check_compiled(vertex_shader, GL_VERTEX_SHADER, self.vertex_path)
+                self._check_compiled(fragment_shader, GL_FRAGMENT_SHADER, self.fragment_path)
 
-    def _compile_shader(self, source: str, shader_type, path: str):
-        shader = glCreateShader(shader_type)
-        glShaderSource(shader, source)
-        glCompileShader(shader)
+                error = glGetProgramInfoLog(self.id).decode()
+                raise RuntimeError(f"❌ Shader link error ({self.name}):\n{error}")
+        finally:
+            glDetachShader(self.id, vertex_shader)
+            glDetachShader(self.id, fragment_shader)
+            glDeleteShader(vertex_shader)
+            glDeleteShader(fragment_shader)
 
+        self.binary_cache.store(self.id, self._cache_key)
+
+    def _check_compiled(self, shader, shader_type, path: str):
         if not glGetShaderiv(shader, GL_COMPILE_STATUS):
             error = glGetShaderInfoLog(shader).decode()
             shader_name = "VERTEX" if shader_type == GL_VERTEX_SHADER else "FRAGMENT"
             raise RuntimeError(
-                f"❌ {shader_name} shader compilation error ({path}):\n{error}"
+                f"❌ {shader_name} shader compilation error ({path} {self.defines}):\n{error}"
             )
 
-        return shader
+    def _reflect_uniforms(self):
+        """Enumerate the active (non-block) uniforms once, at link time"""
+        for index in range(glGetProgramiv(self.id, GL_ACTIVE_UNIFORMS)):
+            name, _size, gl_type = glGetActiveUniform(self.id, index)
+            if isinstance(name, bytes):
+                name = name.decode()
+
+            # Arrays are reported as "name[0]"
+            if name.endswith("[0]"):
+                name = name[:-3]
 
-    def _get_uniform_location(self, name: str) -> int:
-        if name in self._uniform_cache:
-            return self._uniform_cache[name]
+            gl_type = int(gl_type)
+            location = glGetUniformLocation(self.id, name)
+            if location == -1 or gl_type not in _UNIFORM_TYPES:
+                # Uniform block members have no location
+                continue
 
-        location = glGetUniformLocation(self.id, name)
-        # if location == -1:
-        #     # Not fatal — OpenGL allows unused uniforms
-        #     # But good to know during development
-        #     print(f"⚠️ Warning: uniform '{name}' not found in shader")
+            self.uniforms[name] = Uniform(self, name, location, gl_type)
 
-        self._uniform_cache[name] = location
-        return location
+    def _uniform(self, name: str):
+        uniform = self.uniforms.get(name)
+        if uniform is None and name not in self._missing_uniforms:
+            # Not fatal — OpenGL allows unused uniforms
+            # But good to know during development
+            self._missing_uniforms.add(name)
+            print(f"⚠️ Warning: uniform '{name}' not found in shader {self.name}")
+        return uniform
 
     # ==================================================
     # PUBLIC API
     # ==================================================
     def use(self):
-        glUseProgram(self.id)
+        gl_state.use_program(self.id)
 
     # =============================
     # UNIFORMS
     # =============================
+    def reset_stats(self):
+        self.stats = {"uploads": 0, "skipped": 0}
+
+    @classmethod
+    def begin_frame(cls):
+        """Start counting uniform uploads/skips for a new frame"""
+        for shader in cls.programs:
+            shader.reset_stats()
+
+    def set(self, name: str, value):
+        uniform = self._uniform(name)
+        if uniform is not None:
+            uniform.set(value)
+
     def set_mat4(self, name: str, mat):
-        glUniformMatrix4fv(
-            self._get_uniform_location(name),
-            1,
-            GL_FALSE,
-            glm.value_ptr(mat)
-        )
+        self.set(name, mat)
+
+    def set_mat3(self, name: str, mat):
+        self.set(name, mat)
+
+    def set_vec2(self, name: str, vec):
+        self.set(name, vec)
 
     def set_vec3(self, name: str, vec):
-        glUniform3f(
-            self._get_uniform_location(name),
-            float(vec.x),
-            float(vec.y),
-            float(vec.z)
-        )
+        self.set(name, vec)
 
     def set_float(self, name: str, value: float):
-        glUniform1f(self._get_uniform_location(name), float(value))
+        self.set(name, value)
 
     def set_int(self, name: str, value: int):
-        glUniform1i(self._get_uniform_location(name), int(value))
+        self.set(name, value)
 
     def set_bool(self, name: str, value: bool):
-        glUniform1i(self._get_uniform_location(name), 1 if value else 0)
+        self.set(name, 1 if value else 0)
+
+
+class ShaderLibrary:
+    """Named shader programs/variants, all compiled up front.
+
+    Every program is submitted before any status is queried, and with
+    GL_KHR_parallel_shader_compile the driver compiles them on its own
+    threads, so building many variants costs little more than one.
+    """
+
+    def __init__(self):
+        self._requests = {}
+        self.programs = {}
+
+    def add(self, name, vertex_path, fragment_path, defines=None):
+        self._requests[name] = (vertex_path, fragment_path, defines)
+
+    def build(self):
+        global _PARALLEL_COMPILE
+
+        if glMaxShaderCompilerThreadsKHR is not None and \
+                gl_state.has_extension("GL_KHR_parallel_shader_compile"):
+            # 0xFFFFFFFF = let the driver pick the thread count
+            glMaxShaderCompilerThreadsKHR(0xFFFFFFFF)
+            _PARALLEL_COMPILE = True
+
+        started = {
+            name: Shader(vertex_path, fragment_path, defines, deferred=True)
+            for name, (vertex_path, fragment_path, defines) in self._requests.items()
+        }
+        self._requests.clear()
+
+        # Finish in completion order where the driver can tell us
+        while started:
+            done = [name for name, shader in started.items() if shader.ready]
+            if not done:
+                # Nothing finished yet; just block on the first one
+                done = [next(iter(started))]
+            for name in done:
+                shader = started.pop(name)
+                shader.finish()
+                self.programs[name] = shader
+
+        return self
+
+    def __getitem__(self, name):
+        return self.programs[name]
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import struct
+
+import numpy as np
+from OpenGL.GL import *
+
+
+class ProgramBinaryCache:
+    """On-disk cache of linked program binaries (glGetProgramBinary).
+
+    Entries are keyed by the shader sources plus the GL vendor, renderer
+    and version strings, so a driver update simply misses the cache.
+    Each file is a little-endian uint32 binary format followed by the
+    program binary.
+    """
+
+    def __init__(self, directory=".shader_cache"):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._supported = None
+        self._driver = None
+
+    # =============================
+    # DRIVER INFO
+    # =============================
+    @property
+    def supported(self):
+        if self._supported is None:
+            try:
+                self._supported = (
+                    bool(glGetProgramBinary)
+                    and bool(glProgramBinary)
+                    and int(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS)) > 0
+                )
+            except Exception:
+                self._supported = False
+        return self._supported
+
+    def _driver_id(self):
+        if self._driver is None:
+            parts = []
+            for name in (GL_VENDOR, GL_RENDERER, GL_VERSION):
+                value = glGetString(name) or b""
+                parts.append(value.decode(errors="replace"))
+            self._driver = "|".join(parts)
+        return self._driver
+
+    def key(self, *sources):
+        digest = hashlib.sha256(self._driver_id().encode())
+        for source in sources:
+            digest.update(b"\0")
+            digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    # =============================
+    # LOAD / STORE
+    # =============================
+    def load(self, program, key):
+        """Try to restore `program` from disk; True if it linked"""
+        if not self.supported:
+            return False
+
+        try:
+            with open(self._path(key), "rb") as f:
+                blob = f.read()
+        except OSError:
+            self.misses += 1
+            return False
+
+        if len(blob) <= 4:
+            self.misses += 1
+            return False
+
+        binary_format = struct.unpack("<I", blob[:4])[0]
+        binary = np.frombuffer(blob, dtype=np.uint8, offset=4)
+
+        glProgramBinary(program, binary_format, binary, len(binary))
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            # Driver rejected it (e.g. updated since it was written)
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def prepare(self, program):
+        """Ask the driver to keep the binary retrievable (call before linking)"""
+        if self.supported:
+            glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+
+    def store(self, program, key):
+        if not self.supported:
+            return
+
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if length <= 0:
+            return
+
+        binary = np.empty(length, dtype=np.uint8)
+        written = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        glGetProgramBinary(program, length, written, binary_format, binary)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(struct.pack("<I", int(binary_format[0])))
+                f.write(binary[:int(written[0])].tobytes())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Warning: could not write shader cache: {e}")
+
+    def report(self):
+        if self.supported:
+            print(f"🗂️ Shader cache: {self.hits} hit(s), {self.misses} miss(es)")
+        else:
+            print("🗂️ Shader cache: program binaries not supported by driver")
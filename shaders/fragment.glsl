@@ -1,38 +1,41 @@
 #version 330 core
 
+// Variants:
+//   LIT      - Phong lighting, opaque output
+//   TEXTURED - color from texture1 instead of objectColor
+
 out vec4 FragColor;
 
 in vec3 FragPos;
 in vec3 Normal;
 in vec2 TexCoords;
+in vec3 Tint;
+
+#include "frame_block.glsl"
 
+#ifdef TEXTURED
 uniform sampler2D texture1;
+#else
+uniform vec3 objectColor;
+#endif
 
-uniform vec3 lightPos;
-uniform vec3 viewPos;
-uniform vec3 lightColor;
+#ifdef LIT
+#include "lighting.glsl"
+#else
+uniform float alpha;
+#endif
 
 void main()
 {
-    // Ambient
-    float ambientStrength = 0.2;
-    vec3 ambient = ambientStrength * lightColor;
-
-    // Diffuse
-    vec3 norm = normalize(Normal);
-    vec3 lightDir = normalize(lightPos - FragPos);
-    float diff = max(dot(norm, lightDir), 0.0);
-    vec3 diffuse = diff * lightColor;
-
-    // Specular (Phong)
-    float specularStrength = 0.5;
-    vec3 viewDir = normalize(viewPos - FragPos);
-    vec3 reflectDir = reflect(-lightDir, norm);
-    float spec = pow(max(dot(viewDir, reflectDir), 0.0), 32);
-    vec3 specular = specularStrength * spec * lightColor;
-
-    vec3 lighting = ambient + diffuse + specular;
-    vec3 texColor = texture(texture1, TexCoords).rgb;
-
-    FragColor = vec4(lighting * texColor, 1.0);
+#ifdef TEXTURED
+    vec3 color = texture(texture1, TexCoords).rgb * Tint;
+#else
+    vec3 color = objectColor * Tint;
+#endif
+
+#ifdef LIT
+    FragColor = vec4(phong(normalize(Normal), FragPos) * color, 1.0);
+#else
+    FragColor = vec4(color, alpha);
+#endif
 }
@@ -0,0 +1,10 @@
+// Shared per-frame data, see frame_uniforms.py for the layout
+layout (std140) uniform Frame
+{
+    mat4 projection;
+    mat4 view;
+    mat4 ortho;
+    vec4 viewPos;
+    vec4 lightPos;
+    vec4 lightColor;
+};
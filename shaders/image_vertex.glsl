@@ -1,13 +1,15 @@
 #version 330 core
 layout (location = 0) in vec3 aPos;
-layout (location = 1) in vec2 aTex;
+layout (location = 2) in vec2 aTex;
 
 out vec2 TexCoords;
 
-uniform mat4 projection;
+#include "frame_block.glsl"
+
+uniform mat4 model;
 
 void main()
 {
     TexCoords = aTex;
-    gl_Position = projection * vec4(aPos, 1.0);
+    gl_Position = ortho * model * vec4(aPos, 1.0);
 }
@@ -0,0 +1,21 @@
+// Phong lighting factor for the Frame block light (needs frame_block.glsl)
+vec3 phong(vec3 norm, vec3 fragPos)
+{
+    // Ambient
+    float ambientStrength = 0.2;
+    vec3 ambient = ambientStrength * lightColor.rgb;
+
+    // Diffuse
+    vec3 lightDir = normalize(lightPos.xyz - fragPos);
+    float diff = max(dot(norm, lightDir), 0.0);
+    vec3 diffuse = diff * lightColor.rgb;
+
+    // Specular (Phong)
+    float specularStrength = 0.5;
+    vec3 viewDir = normalize(viewPos.xyz - fragPos);
+    vec3 reflectDir = reflect(-lightDir, norm);
+    float spec = pow(max(dot(viewDir, reflectDir), 0.0), 32);
+    vec3 specular = specularStrength * spec * lightColor.rgb;
+
+    return ambient + diffuse + specular;
+}
@@ -7,6 +7,13 @@ uniform vec3 textColor;
 
 void main()
 {
+#ifdef SDF
+    // Distance field: 0.5 is the glyph edge, antialiased over ~1 screen pixel
+    float distance = texture(text, TexCoords).r;
+    float width = max(fwidth(distance) * 0.7, 1e-4);
+    float alpha = smoothstep(0.5 - width, 0.5 + width, distance);
+#else
     float alpha = texture(text, TexCoords).r; // 🔴 IMPORTANT
+#endif
     FragColor = vec4(textColor, alpha);
 }
@@ -3,10 +3,13 @@ layout (location = 0) in vec4 vertex;
 
 out vec2 TexCoords;
 
-uniform mat4 projection;
+// Layouts are cached at the origin and placed here
+uniform vec2 offset;
+
+#include "frame_block.glsl"
 
 void main()
 {
-    gl_Position = projection * vec4(vertex.xy, 0.0, 1.0);
+    gl_Position = ortho * vec4(vertex.xy + offset, 0.0, 1.0);
     TexCoords = vertex.zw;
 }
@@ -1,9 +0,0 @@
-#version 330 core
-out vec4 FragColor;
-
-uniform vec3 objectColor;
-
-void main()
-{
-    FragColor = vec4(objectColor, 0.85);
-}
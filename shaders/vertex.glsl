@@ -1,22 +1,51 @@
 #version 330 core
 
+// Variants:
+//   INSTANCED - model/normal matrix and tint come from per-instance attributes
+//   SCREEN    - project with the screen-space ortho matrix (UI quads)
+
 layout (location = 0) in vec3 aPos;
 layout (location = 1) in vec3 aNormal;
 layout (location = 2) in vec2 aTexCoords;
 
+#ifdef INSTANCED
+// Per-instance attributes (glVertexAttribDivisor = 1)
+layout (location = 3) in mat4 aModel;         // occupies locations 3..6
+layout (location = 7) in mat3 aNormalMatrix;  // occupies locations 7..9
+layout (location = 10) in vec3 aTint;
+#else
+uniform mat4 model;
+uniform mat3 normalMatrix;  // transpose(inverse(model)), precomputed on the CPU
+uniform vec3 tint = vec3(1.0);
+#endif
+
 out vec3 FragPos;
 out vec3 Normal;
 out vec2 TexCoords;
+out vec3 Tint;
 
-uniform mat4 model;
-uniform mat4 view;
-uniform mat4 projection;
+#include "frame_block.glsl"
 
 void main()
 {
+#ifdef INSTANCED
+    FragPos = vec3(aModel * vec4(aPos, 1.0));
+    Normal  = aNormalMatrix * aNormal;
+    Tint = aTint;
+#else
     FragPos = vec3(model * vec4(aPos, 1.0));
-    Normal  = mat3(transpose(inverse(model))) * aNormal;
+#ifdef SCREEN
+    Normal  = aNormal;
+#else
+    Normal  = normalMatrix * aNormal;
+#endif
+    Tint = tint;
+#endif
     TexCoords = aTexCoords;
 
+#ifdef SCREEN
+    gl_Position = ortho * vec4(FragPos, 1.0);
+#else
     gl_Position = projection * view * vec4(FragPos, 1.0);
+#endif
 }
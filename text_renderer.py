@@ -1,125 +1,530 @@
+import os
+from collections import OrderedDict
+
 from OpenGL.GL import *
 import freetype
 import ctypes
 import glm
+import numpy as np
+
+from gl_state import gl_state
+from glyph_atlas import GlyphPages
+from glyph_cache import GlyphDiskCache
 
 
 class TextRenderer:
-    def __init__(self, font_path, font_size=48):
-        # Store glyph data
+    """Draws strings from signed-distance-field glyph atlas pages.
+
+    Glyphs are rasterized the first time a string needs them, as distance
+    fields at SDF_SIZE pixels, and the "text" shader's SDF variant
+    thresholds them, so every scale stays sharp. `font_size` is only the
+    on-screen size at scale 1.0. Characters missing from the font come
+    from the first `fallback_fonts` face that has them. Atlas pages are
+    recycled least recently used first once `atlas_budget` bytes are in use.
+
+    `measure()`, `wrap()` and `layout()` apply kerning, wrap to a maximum
+    width and align lines left, center or right; results are memoized.
+
+    Rasterized glyphs are kept in a GlyphDiskCache under `cache_dir`
+    (None disables it); FreeType is only opened for glyphs it lacks.
+    """
+
+    SDF_SIZE = 32       # rasterization size; FreeType pads each glyph by 8px
+    ATLAS_SIZE = 512
+
+    LINE_SPACING = 1.25         # line height, in multiples of font_size
+    ALIGNMENTS = {"left": 0.0, "center": 0.5, "right": 1.0}
+    MEASURE_CACHE_SIZE = 4096   # memoized widths/wraps before starting over
+
+    def __init__(self, font_path, font_size=48, fallback_fonts=(), atlas_budget=1 << 20,
+                 cache_dir=".glyph_cache"):
+        # Store glyph data (in SDF_SIZE pixels)
         self.characters = {}
+        self.font_size = font_size
 
-        # Load font
-        face = freetype.Face(font_path)
-        face.set_pixel_sizes(0, font_size)
-
-        # IMPORTANT for FreeType bitmap alignment
-        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-
-        # Load ASCII characters
-        for c in range(32, 128):
-            face.load_char(chr(c))
-            glyph = face.glyph
-            bitmap = glyph.bitmap
-
-            # Generate texture for glyph
-            texture = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, texture)
-
-            glTexImage2D(
-                GL_TEXTURE_2D,
-                0,
-                GL_RED,
-                bitmap.width,
-                bitmap.rows,
-                0,
-                GL_RED,
-                GL_UNSIGNED_BYTE,
-                bitmap.buffer
-            )
-
-            # Texture parameters
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-
-            # Store character info
-            self.characters[c] = {
-                "texture": texture,
-                "size": (bitmap.width, bitmap.rows),
-                "bearing": (glyph.bitmap_left, glyph.bitmap_top),
-                "advance": glyph.advance.x
-            }
-
-        glBindTexture(GL_TEXTURE_2D, 0)
-
-        # ===== VAO & VBO =====
-        self.vao = glGenVertexArrays(1)
-        self.vbo = glGenBuffers(1)
+        # Faces are opened on the first glyph miss
+        self.font_paths = [font_path] + [p for p in fallback_fonts if os.path.exists(p)]
+        self._faces = None
 
-        glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        self.disk_cache = None
+        if cache_dir:
+            key = GlyphDiskCache.key(self.font_paths, self.SDF_SIZE)
+            self.disk_cache = GlyphDiskCache(key, cache_dir)
 
-        # 6 vertices × 4 floats (x, y, u, v)
-        glBufferData(GL_ARRAY_BUFFER, 6 * 4 * 4, None, GL_DYNAMIC_DRAW)
+        self.pages = GlyphPages(self.ATLAS_SIZE, atlas_budget, on_evict=self._evict_page)
 
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(
-            0,
-            4,
-            GL_FLOAT,
-            GL_FALSE,
-            4 * 4,
-            ctypes.c_void_p(0)
+        # Per-glyph metrics as NumPy rows, in font_size pixels
+        self._free_slots = []
+        self._slot_count = 0
+        self._uv = np.zeros((128, 4), dtype=np.float32)
+        self._size = np.zeros((128, 2), dtype=np.float32)
+        self._bearing = np.zeros((128, 2), dtype=np.float32)
+        self._advance = np.zeros(128, dtype=np.float32)
+        self._texture = np.zeros(128, dtype=np.uint32)
+        self._page_by_texture = {}
+
+        # Memoized kerning pairs, line widths and wraps
+        self._kerning_pairs = {}
+        self._measures = {}
+
+        # Layout staging; finished layouts get their own buffers
+        self.batch = QuadBatch()
+        self.layouts = LayoutCache()
+
+    # =============================
+    # GLYPHS
+    # =============================
+    def _face_for(self, code):
+        """First face that has `code` (the main font's .notdef if none do)"""
+        if self._faces is None:
+            self._faces = []
+            for path in self.font_paths:
+                face = freetype.Face(path)
+                face.set_pixel_sizes(0, self.SDF_SIZE)
+                self._faces.append(face)
+
+        for face in self._faces:
+            if face.get_char_index(code):
+                return face
+        return self._faces[0]
+
+    def _rasterize(self, code):
+        """Render one glyph as a distance field from its outline.
+
+        Returns (width, rows, left, top, advance, pixels).
+        """
+        face = self._face_for(code)
+        face.load_char(chr(code), freetype.FT_LOAD_DEFAULT | freetype.FT_LOAD_NO_BITMAP)
+        glyph = face.glyph
+        glyph.render(freetype.FT_RENDER_MODE_SDF)
+        bitmap = glyph.bitmap
+
+        return (
+            bitmap.width, bitmap.rows, glyph.bitmap_left, glyph.bitmap_top,
+            glyph.advance.x, bitmap.buffer
+        )
+
+    def _load_glyph(self, code):
+        """Bring one glyph into the atlas, from the disk cache or FreeType"""
+        cached = self.disk_cache.get(code) if self.disk_cache else None
+        if cached is None:
+            cached = self._rasterize(code)
+            if self.disk_cache:
+                self.disk_cache.put(code, *cached)
+
+        width, rows, left, top, advance, pixels = cached
+
+        page, uv = None, (0.0, 0.0, 0.0, 0.0)
+        if width and rows:
+            packed = self.pages.add(width, rows, pixels)
+            if packed is None:
+                print(f"⚠️ Warning: glyph {chr(code)!r} is larger than an atlas page")
+                return
+            page, uv = packed
+
+        self._store(code, {
+            "uv": uv,
+            "size": (width, rows),
+            "bearing": (left, top),
+            "advance": advance,
+            "page": page,
+        })
+
+    def save_cache(self):
+        """Write glyphs rasterized this run to the disk cache"""
+        if self.disk_cache:
+            self.disk_cache.save()
+
+    def report_cache(self):
+        if self.disk_cache:
+            self.disk_cache.report()
+
+    def _store(self, code, glyph):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = self._slot_count
+            self._slot_count += 1
+            if slot == len(self._advance):
+                self._grow()
+
+        # SDF_SIZE pixels → font_size pixels
+        units = self.font_size / self.SDF_SIZE
+
+        page = glyph["page"]
+        self._uv[slot] = glyph["uv"]
+        self._size[slot] = np.array(glyph["size"]) * units
+        self._bearing[slot] = np.array(glyph["bearing"]) * units
+        # 1/64th pixels → whole pixels
+        self._advance[slot] = glyph["advance"] / 64 * units
+        self._texture[slot] = page.texture if page else 0
+        if page:
+            self._page_by_texture[page.texture] = page
+
+        glyph["slot"] = slot
+        self.characters[code] = glyph
+
+    def _grow(self):
+        for name in ("_uv", "_size", "_bearing", "_advance", "_texture"):
+            rows = getattr(self, name)
+            grown = np.zeros((len(rows) * 2,) + rows.shape[1:], dtype=rows.dtype)
+            grown[:len(rows)] = rows
+            setattr(self, name, grown)
+
+    def _evict_page(self, page):
+        """A page was recycled: forget its glyphs and every layout using them"""
+        for code, glyph in list(self.characters.items()):
+            if glyph["page"] is page:
+                self._free_slots.append(glyph["slot"])
+                del self.characters[code]
+        self.layouts.clear()
+
+    def _load_glyphs(self, text):
+        """Make sure every character of `text` is in the atlas; warns if they can't all fit"""
+        codes = dict.fromkeys(ord(c) for c in text)
+
+        # Glyphs already loaded become newest, so making room for the
+        # others recycles pages this text doesn't use
+        for code in codes:
+            glyph = self.characters.get(code)
+            if glyph is not None and glyph["page"] is not None:
+                self.pages.touch(glyph["page"])
+
+        evictions = self.pages.evictions
+        for code in codes:
+            if code not in self.characters:
+                self._load_glyph(code)
+
+        # A recycled page may still have taken some of this text's glyphs
+        # (more of them than one page holds); one more pass brings them back
+        if self.pages.evictions != evictions:
+            for code in codes:
+                if code not in self.characters:
+                    self._load_glyph(code)
+
+        if any(code not in self.characters for code in codes):
+            print(f"⚠️ Warning: glyphs of {text!r} don't fit the glyph atlas budget")
+
+    def _glyph_slots(self, text):
+        """Codes and current metric rows of the loaded characters of `text`.
+
+        Loads nothing: slots are only valid until the next glyph load.
+        """
+        characters = self.characters
+        codes = [code for code in map(ord, text) if code in characters]
+        slots = np.array([characters[code]["slot"] for code in codes], dtype=np.int32)
+        return codes, slots
+
+    # =============================
+    # KERNING
+    # =============================
+    def _pair_kerning(self, left, right):
+        """Kerning between two codes in 1/64th SDF_SIZE pixels (0 across faces)"""
+        if self.disk_cache:
+            value = self.disk_cache.get_kerning(left, right)
+            if value is not None:
+                return value
+
+        face = self._face_for(left)
+        value = 0
+        if face.has_kerning and face is self._face_for(right):
+            value = face.get_kerning(face.get_char_index(left), face.get_char_index(right)).x
+
+        if self.disk_cache:
+            self.disk_cache.put_kerning(left, right, value)
+        return value
+
+    def _kerning(self, codes):
+        """Kerning after each glyph in font_size pixels (0 after the last)"""
+        kerning = np.zeros(len(codes), dtype=np.float32)
+        pairs = self._kerning_pairs
+        for i, pair in enumerate(zip(codes, codes[1:])):
+            value = pairs.get(pair)
+            if value is None:
+                value = pairs[pair] = self._pair_kerning(*pair)
+            kerning[i] = value
+
+        return kerning * (self.font_size / self.SDF_SIZE / 64)
+
+    # =============================
+    # MEASUREMENT & WRAPPING
+    # =============================
+    def _line_advances(self, line):
+        """Metric rows and kerned advances (scale 1.0) for one line of loaded text"""
+        codes, slots = self._glyph_slots(line)
+        return slots, self._advance[slots] + self._kerning(codes)
+
+    def _memo(self, key, compute):
+        value = self._measures.get(key)
+        if value is None:
+            if len(self._measures) >= self.MEASURE_CACHE_SIZE:
+                self._measures.clear()
+            value = self._measures[key] = compute()
+        return value
+
+    def line_height(self, scale=1.0):
+        return self.font_size * self.LINE_SPACING * scale
+
+    def line_width(self, line, scale=1.0):
+        """Advance width of one line in pixels (memoized)"""
+        return self._memo(
+            ("width", line, scale),
+            lambda: self._line_width(line) * scale
+        )
+
+    def _line_width(self, line):
+        self._load_glyphs(line)
+        return float(self._line_advances(line)[1].sum())
+
+    def wrap(self, text, scale=1.0, max_width=None):
+        """Split `text` into lines at newlines and, past `max_width`, at spaces.
+
+        A single word wider than `max_width` gets a line of its own.
+        """
+        return self._memo(("wrap", text, scale, max_width), lambda: self._wrap(text, scale, max_width))
+
+    def _wrap(self, text, scale, max_width):
+        lines = []
+        for paragraph in text.split("\n"):
+            if max_width is None:
+                lines.append(paragraph)
+                continue
+
+            # split() drops empty words, so runs of spaces don't add blank
+            # or over-wide lines
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if not line or self.line_width(candidate, scale) <= max_width:
+                    line = candidate
+                else:
+                    lines.append(line)
+                    line = word
+            lines.append(line)
+        return tuple(lines)
+
+    def measure(self, text, scale=1.0, max_width=None):
+        """(width, height) in pixels of `text` as `layout()` would place it"""
+        lines = self.wrap(text, scale, max_width)
+        width = max(self.line_width(line, scale) for line in lines)
+        return width, len(lines) * self.line_height(scale)
+
+    # =============================
+    # LAYOUT & DRAWING
+    # =============================
+    def _build_quads(self, text, scale, max_width, align):
+        """Lay the text out into the batch around the origin, grouped by atlas page.
+
+        The first baseline is at y = 0 and later lines go down; `align`
+        places each line's left edge, center or right edge at x = 0.
+        Returns [(texture, first vertex, vertex count), ...].
+        """
+        if align not in self.ALIGNMENTS:
+            raise ValueError(f"❌ Unknown text alignment {align!r}")
+
+        lines = self.wrap(text, scale, max_width)
+
+        # Load the whole text first: a page recycled for a later line
+        # would otherwise hand earlier lines' slots to other glyphs
+        self._load_glyphs("".join(lines))
+
+        rows, pens, baselines = [], [], []
+        for i, line in enumerate(lines):
+            indices, advance = self._line_advances(line)
+            if not len(indices):
+                continue
+
+            # Pen position before each glyph
+            advance = advance * scale
+            x = -self.ALIGNMENTS[align] * float(advance.sum())
+            rows.append(indices)
+            pens.append(x + np.cumsum(advance) - advance)
+            baselines.append(np.full(len(indices), -i * self.line_height(scale), dtype=np.float32))
+
+        if not rows:
+            return []
+        indices, pen, baseline = np.concatenate(rows), np.concatenate(pens), np.concatenate(baselines)
+
+        # Blank glyphs (spaces) only move the pen
+        size = self._size[indices]
+        visible = (size[:, 0] > 0) & (size[:, 1] > 0)
+        indices, pen, baseline = indices[visible], pen[visible], baseline[visible]
+        if not len(indices):
+            return []
+
+        # One run of quads per page
+        order = np.argsort(self._texture[indices], kind="stable")
+        indices, pen, baseline = indices[order], pen[order], baseline[order]
+        textures = self._texture[indices]
+
+        size = self._size[indices] * scale
+        bearing = self._bearing[indices] * scale
+        x0 = pen + bearing[:, 0]
+        y0 = baseline - (size[:, 1] - bearing[:, 1])
+        uv = self._uv[indices]
+
+        self.batch.set_quads(
+            x0, y0, x0 + size[:, 0], y0 + size[:, 1],
+            uv[:, 0], uv[:, 1], uv[:, 2], uv[:, 3]
         )
 
-        glBindBuffer(GL_ARRAY_BUFFER, 0)
-        glBindVertexArray(0)
+        starts = np.flatnonzero(np.r_[True, textures[1:] != textures[:-1]])
+        ends = np.r_[starts[1:], len(textures)]
+        return [
+            (int(textures[start]), int(start) * 6, int(end - start) * 6)
+            for start, end in zip(starts, ends)
+        ]
+
+    def layout(self, text, scale=1.0, max_width=None, align="left"):
+        """Cached GPU layout of `text` around the origin (None if nothing to draw)"""
+        key = (text, scale, max_width, align)
+        layout, hit = self.layouts.get(key)
+        if not hit:
+            runs = self._build_quads(text, scale, max_width, align)
+            layout = TextLayout(self.batch.vertices[:self.batch.count], runs) if runs else None
+            self.layouts.put(key, layout)
+        return layout
+
+    def render_text(self, shader, text, x, y, scale, color, max_width=None, align="left"):
+        """Draw `text` with its first baseline at y and aligned on x.
+
+        One draw call per atlas page; the text is only laid out the first
+        time it's seen.
+        """
+        layout = self.layout(text, scale, max_width, align)
+        if layout is None:
+            return
 
-    def render_text(self, shader, text, x, y, scale, color):
         shader.use()
         shader.set_vec3("textColor", color)
+        shader.set_vec2("offset", glm.vec2(x, y))
         shader.set_int("text", 0)  # ✅ FIX
 
-        glActiveTexture(GL_TEXTURE0)
-        glBindVertexArray(self.vao)
+        for texture, _, _ in layout.runs:
+            self.pages.touch(self._page_by_texture[texture])
+        layout.draw()
 
-        for char in text:
-            ch = self.characters.get(ord(char))
-            if ch is None:
-                continue
 
-            xpos = x + ch["bearing"][0] * scale
-            ypos = y - (ch["size"][1] - ch["bearing"][1]) * scale
+class TextLayout:
+    """A laid-out string with its own static VAO/VBO (x, y, u, v per vertex).
+
+    `runs` are (texture, first vertex, vertex count), one per atlas page.
+    """
 
-            w = ch["size"][0] * scale
-            h = ch["size"][1] * scale
+    def __init__(self, vertices, runs):
+        self.runs = runs
 
-            vertices = (
-                xpos,     ypos + h,   0.0, 0.0,
-                xpos,     ypos,       0.0, 1.0,
-                xpos + w, ypos,       1.0, 1.0,
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+
+        gl_state.bind_vertex_array(self.vao)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 4, GL_FLOAT, GL_FALSE, 4 * 4, ctypes.c_void_p(0))
+
+        gl_state.bind_vertex_array(0)
+
+    def draw(self):
+        gl_state.bind_vertex_array(self.vao)
+        for texture, first, count in self.runs:
+            gl_state.bind_texture(texture)
+            glDrawArrays(GL_TRIANGLES, first, count)
+            gl_state.draw_calls += 1
+
+    def delete(self):
+        gl_state.bind_vertex_array(0)
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteBuffers(1, [self.vbo])
+
+
+class LayoutCache:
+    """Least-recently-used TextLayouts of one font, keyed by (text, scale).
+
+    Static labels stay resident; a line being typed adds one entry per
+    distinct string, and the oldest fall out once `capacity` is reached.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
-                xpos,     ypos + h,   0.0, 0.0,
-                xpos + w, ypos,       1.0, 1.0,
-                xpos + w, ypos + h,   1.0, 0.0
-            )
+    def get(self, key):
+        """Returns (layout, hit)"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key], True
 
-            glBindTexture(GL_TEXTURE_2D, ch["texture"])
-            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        self.misses += 1
+        return None, False
 
-            glBufferSubData(
-                GL_ARRAY_BUFFER,
-                0,
-                ctypes.sizeof(ctypes.c_float * len(vertices)),
-                (ctypes.c_float * len(vertices))(*vertices)
-            )
+    def clear(self):
+        for layout in self.entries.values():
+            if layout is not None:
+                layout.delete()
+        self.entries.clear()
 
-            glDrawArrays(GL_TRIANGLES, 0, 6)
+    def put(self, key, layout):
+        self.entries[key] = layout
+        while len(self.entries) > self.capacity:
+            _, evicted = self.entries.popitem(last=False)
+            if evicted is not None:
+                evicted.delete()
+
+
+class QuadBatch:
+    """Textured quads staged on the CPU.
+
+    Vertices (x, y, u, v) live in a preallocated NumPy array that only
+    grows; owners copy the used part into their own buffers.
+    """
+
+    def __init__(self, capacity=256):
+        self.vertices = np.zeros((capacity * 6, 4), dtype=np.float32)
+        self.count = 0
+
+    def set_quads(self, x0, y0, x1, y1, u0, v0, u1, v1):
+        """Fill one quad per array element (v0 = top edge); returns the vertex count"""
+        n = len(x0)
+        if n * 6 > len(self.vertices):
+            self.vertices = np.zeros((max(n * 6, len(self.vertices) * 2), 4), dtype=np.float32)
+
+        # Two triangles: top-left, bottom-left, bottom-right / top-left, bottom-right, top-right
+        quads = self.vertices[:n * 6].reshape(n, 6, 4)
+        quads[:, [0, 1, 3], 0] = x0[:, None]
+        quads[:, [2, 4, 5], 0] = x1[:, None]
+        quads[:, [0, 3, 5], 1] = y1[:, None]
+        quads[:, [1, 2, 4], 1] = y0[:, None]
+        quads[:, [0, 1, 3], 2] = u0[:, None]
+        quads[:, [2, 4, 5], 2] = u1[:, None]
+        quads[:, [0, 3, 5], 3] = v0[:, None]
+        quads[:, [1, 2, 4], 3] = v1[:, None]
+
+        self.count = n * 6
+        return self.count
+
+
+class QuadStream(QuadBatch):
+    """A QuadBatch redrawn every frame from one streaming VBO.
+
+    `upload()` orphans the VBO and copies the used part in one go.
+    """
+
+    def __init__(self, capacity=256):
+        super().__init__(capacity)
+        self.vbo = glGenBuffers(1)
 
-            # Advance cursor (1/64th pixels → pixels)
-            x += (ch["advance"] >> 6) * scale
+    def upload(self):
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.vbo)
+        # Orphan: the driver hands out fresh storage instead of waiting on
+        # draws still reading the previous contents
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, self.count * 16, self.vertices)
 
-        glBindVertexArray(0)
-        glBindTexture(GL_TEXTURE_2D, 0)
+    def draw(self):
+        glDrawArrays(GL_TRIANGLES, 0, self.count)
+        gl_state.draw_calls += 1
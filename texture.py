@@ -1,9 +1,15 @@
+import ctypes
+from concurrent.futures import ThreadPoolExecutor
+
 from OpenGL.GL import *
 from PIL import Image
+import numpy as np
+
+from gl_state import gl_state
 
 def load_texture(path):
     texture = glGenTextures(1)
-    glBindTexture(GL_TEXTURE_2D, texture)
+    gl_state.bind_texture(texture)
 
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
@@ -27,3 +33,104 @@ def load_texture(path):
 
     glGenerateMipmap(GL_TEXTURE_2D)
     return texture
+
+
+def decode_image(path):
+    """RGB pixels, bottom row first (GL order); safe to run off the GL thread"""
+    with Image.open(path) as image:
+        image = image.convert("RGB").transpose(Image.FLIP_TOP_BOTTOM)
+        return np.ascontiguousarray(np.asarray(image, dtype=np.uint8))
+
+
+class AsyncTextureLoader:
+    """Loads textures without stalling the frame they are requested in.
+
+    `load()` returns a texture name at once, holding a 1x1 placeholder
+    color. The image is decoded on a worker thread; `update()` (called
+    once per frame on the GL thread) uploads finished images through a
+    pixel buffer object, at most UPLOADS_PER_FRAME per call, so the
+    copy into GL memory happens outside the glTexImage2D call.
+    """
+
+    UPLOADS_PER_FRAME = 1
+    PLACEHOLDER_COLOR = (128, 128, 128)
+
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="texture")
+        self.pbo = glGenBuffers(1)
+        self.pending = []  # (texture, path, future), in request order
+
+    def load(self, path):
+        texture = glGenTextures(1)
+        gl_state.bind_texture(texture)
+
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_RGB, 1, 1, 0,
+            GL_RGB, GL_UNSIGNED_BYTE, bytes(self.PLACEHOLDER_COLOR)
+        )
+
+        self.pending.append((texture, path, self.executor.submit(decode_image, path)))
+        return texture
+
+    def update(self):
+        """Upload decoded images (GL thread only); returns how many were uploaded"""
+        uploaded = 0
+        for entry in list(self.pending):
+            if uploaded == self.UPLOADS_PER_FRAME:
+                break
+
+            texture, path, future = entry
+            if not future.done():
+                continue
+
+            self.pending.remove(entry)
+            try:
+                pixels = future.result()
+            except Exception as e:
+                print(f"❌ Could not load texture {path}: {e}")
+                continue
+
+            self._upload(texture, pixels)
+            uploaded += 1
+
+        return uploaded
+
+    def _upload(self, texture, pixels):
+        height, width = pixels.shape[:2]
+
+        # Copy into driver memory through the PBO; glTexImage2D then
+        # sources from the buffer (offset 0) instead of client memory
+        gl_state.bind_buffer(GL_PIXEL_UNPACK_BUFFER, self.pbo)
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, pixels.nbytes, None, GL_STREAM_DRAW)
+        target = glMapBufferRange(
+            GL_PIXEL_UNPACK_BUFFER, 0, pixels.nbytes,
+            GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT
+        )
+        ctypes.memmove(target, pixels.ctypes.data, pixels.nbytes)
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        gl_state.bind_texture(texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_RGB, width, height, 0,
+            GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+        )
+        glGenerateMipmap(GL_TEXTURE_2D)
+
+        # Other uploads (glyph atlas) read client memory again
+        gl_state.bind_buffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def finish(self):
+        """Block until every requested texture is uploaded"""
+        while self.pending:
+            self.pending[0][2].exception()  # wait without raising
+            self.update()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,12 @@
 from OpenGL.GL import *
 import glm
 import ctypes
+import numpy as np
 from PIL import Image
 
+from gl_state import gl_state
+from text_renderer import QuadStream
+
 
 class UIText:
     def __init__(self, font_path):
@@ -10,11 +14,11 @@ class UIText:
         self.chars_per_row = 16
 
         self.texture = self.load_texture(font_path)
-        self.vao, self.vbo = glGenVertexArrays(1), glGenBuffers(1)
+        self.vao = glGenVertexArrays(1)
+        self.batch = QuadStream()
 
-        glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, 6 * 4 * 4, None, GL_DYNAMIC_DRAW)
+        gl_state.bind_vertex_array(self.vao)
+        gl_state.bind_buffer(GL_ARRAY_BUFFER, self.batch.vbo)
 
         glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 4 * 4, ctypes.c_void_p(0))
         glEnableVertexAttribArray(0)
@@ -22,7 +26,7 @@ class UIText:
         glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 4 * 4, ctypes.c_void_p(8))
         glEnableVertexAttribArray(1)
 
-        glBindVertexArray(0)
+        gl_state.bind_vertex_array(0)
 
     def load_texture(self, path):
         image = Image.open(path).convert("RGBA")
@@ -30,7 +34,7 @@ class UIText:
         img_data = image.tobytes()
 
         tex = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, tex)
+        gl_state.bind_texture(tex)
 
         glTexImage2D(
             GL_TEXTURE_2D, 0, GL_RGBA,
@@ -50,32 +54,23 @@ class UIText:
         projection = glm.ortho(0, screen_w, 0, screen_h)
         shader.set_mat4("projection", projection)
 
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, self.texture)
-        glBindVertexArray(self.vao)
-
-        for char in text:
-            ascii_code = ord(char)
-            tx = (ascii_code % self.chars_per_row) / self.chars_per_row
-            ty = (ascii_code // self.chars_per_row) / self.chars_per_row
-
-            w = self.char_size * scale
-            h = self.char_size * scale
+        # Whole string in one upload and one draw
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        if not len(codes):
+            return
 
-            vertices = [
-                x,     y + h, tx,            ty,
-                x,     y,     tx,            ty + 1/16,
-                x + w, y,     tx + 1/16,     ty + 1/16,
+        cell = 1 / self.chars_per_row
+        tx = (codes % self.chars_per_row) * cell
+        ty = (codes // self.chars_per_row) * cell
 
-                x,     y + h, tx,            ty,
-                x + w, y,     tx + 1/16,     ty + 1/16,
-                x + w, y + h, tx + 1/16,     ty
-            ]
+        size = self.char_size * scale
+        x0 = x + np.arange(len(codes), dtype=np.float32) * size
+        y0 = np.full(len(codes), y, dtype=np.float32)
 
-            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-            glBufferSubData(GL_ARRAY_BUFFER, 0, len(vertices) * 4, (ctypes.c_float * len(vertices))(*vertices))
-            glDrawArrays(GL_TRIANGLES, 0, 6)
+        self.batch.set_quads(x0, y0, x0 + size, y0 + size, tx, ty, tx + cell, ty + cell)
 
-            x += w
+        gl_state.bind_texture(self.texture)
+        gl_state.bind_vertex_array(self.vao)
 
-        glBindVertexArray(0)
+        self.batch.upload()
+        self.batch.draw()